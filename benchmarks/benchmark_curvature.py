@@ -0,0 +1,220 @@
+"""
+Benchmark Ollivier and Forman curvature on synthetic graphs.
+
+Every graph generator is run at every requested size, and curvature is
+calculated with FormanRicciCurvature and with OllivierRicciCurvature for every
+combination of dist_type, method and weight_path_matrix. For each run the
+throughput in edges per second, the peak memory allocated during the
+calculation and the time spent in each stage (mass distribution, path matrix,
+optimal transport solve and node contraction) are recorded and written to a
+JSON file, which can be compared against the output of a previous version.
+Cases where the closed form shortcut of OllivierRicciCurvature applies are also
+run with exact_shortcut=False, to check the default is not a slowdown.
+
+Usage:
+    python benchmarks/benchmark_curvature.py --sizes 100 300 --output bench.json
+    python benchmarks/benchmark_curvature.py --compare old.json --output new.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+import networkx as nx
+import numpy as np
+import graph_ricci_curvature
+from graph_ricci_curvature.forman_ricci_curvature import FormanRicciCurvature
+from graph_ricci_curvature.ollivier_ricci_curvature import OllivierRicciCurvature
+
+DIST_TYPES = ["uniform", "linear", "inverse-linear", "gaussian"]
+METHODS = ["otd", "sinkhorn", "sinkhorn-batch"]
+WEIGHT_PATH_MATRIX = [False, True]
+
+
+def erdos_renyi(size, seed):
+    return nx.gnm_random_graph(size, 4 * size, seed=seed)
+
+
+def barabasi_albert(size, seed):
+    return nx.barabasi_albert_graph(size, 4, seed=seed)
+
+
+def powerlaw_cluster(size, seed):
+    """Social network style graph with many triangles"""
+    return nx.powerlaw_cluster_graph(size, 4, 0.5, seed=seed)
+
+
+def grid(size, seed):
+    side = max(2, round(math.sqrt(size)))
+    return nx.convert_node_labels_to_integers(
+        nx.grid_2d_graph(side, side, periodic=True)
+    )
+
+
+def random_geometric(size, seed):
+    """Random geometric graph weighted by the distance between nodes"""
+    radius = math.sqrt(8 / (math.pi * size))
+    G = nx.random_geometric_graph(size, radius, seed=seed)
+    for source, target in G.edges():
+        G[source][target]["weight"] = max(
+            math.dist(G.nodes[source]["pos"], G.nodes[target]["pos"]), 1e-6
+        )
+    return G
+
+
+GENERATORS = {
+    "erdos_renyi": erdos_renyi,
+    "barabasi_albert": barabasi_albert,
+    "powerlaw_cluster": powerlaw_cluster,
+    "grid": grid,
+    "random_geometric": random_geometric,
+}
+
+
+def _largest_component(G):
+    return G.subgraph(max(nx.connected_components(G), key=len)).copy()
+
+
+def run_case(G, calculator, kwargs, memory=True):
+    """
+    Calculate curvature of G once with stage timings and, if memory is True,
+    a second time to measure peak memory
+
+    """
+    obj = calculator(G)
+    profiler = obj.enable_profiling()
+    start = time.perf_counter()
+    obj.calculate_ricci_curvature(**kwargs)
+    seconds = time.perf_counter() - start
+    report = profiler.report()
+
+    result = {
+        "seconds": seconds,
+        "edges_per_second": G.number_of_edges() / seconds,
+        "stages": report["seconds"],
+        "stage_calls": report["calls"],
+        "largest_transport_shape": max(
+            report["transport_shapes"], key=lambda shape: shape[0] * shape[1], default=None
+        ),
+    }
+    if memory:
+        tracemalloc.start()
+        calculator(G).calculate_ricci_curvature(**kwargs)
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def cases(args):
+    yield "FormanRicciCurvature", FormanRicciCurvature, {}
+    for dist_type, method, weight_path_matrix in itertools.product(
+        args.dist_types, args.methods, args.weight_path_matrix
+    ):
+        kwargs = {
+            "dist_type": dist_type,
+            "method": method,
+            "weight_path_matrix": weight_path_matrix,
+        }
+        yield "OllivierRicciCurvature", OllivierRicciCurvature, kwargs
+        # the closed form shortcut is on by default where it applies
+        if dist_type == "uniform" and method == "otd" and not weight_path_matrix:
+            yield "OllivierRicciCurvature", OllivierRicciCurvature, dict(
+                kwargs, exact_shortcut=False
+            )
+
+
+def run(args):
+    results = []
+    for graph_name, size in itertools.product(args.graphs, args.sizes):
+        G = _largest_component(GENERATORS[graph_name](size, args.seed))
+        for calculator_name, calculator, kwargs in cases(args):
+            if calculator_name not in args.calculators:
+                continue
+            result = run_case(G, calculator, kwargs, memory=not args.no_memory)
+            result.update(
+                {
+                    "graph": graph_name,
+                    "size": size,
+                    "nodes": G.number_of_nodes(),
+                    "edges": G.number_of_edges(),
+                    "calculator": calculator_name,
+                    "parameters": kwargs,
+                }
+            )
+            results.append(result)
+            print(
+                f"{graph_name:>16} {size:>7} {calculator_name:>22} "
+                f"{json.dumps(kwargs):<75} {result['edges_per_second']:>12.1f} edges/s",
+                file=sys.stderr,
+            )
+    return {
+        "version": graph_ricci_curvature.__version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "networkx": nx.__version__,
+        "results": results,
+    }
+
+
+def _case_key(result):
+    return (
+        result["graph"],
+        result["size"],
+        result["calculator"],
+        json.dumps(result["parameters"], sort_keys=True),
+    )
+
+
+def compare(previous, current):
+    """
+    Print the speedup of every case of current relative to the same case in
+    previous
+
+    """
+    previous_results = {_case_key(result): result for result in previous["results"]}
+    print(f"speedup of {current['version']} over {previous['version']}")
+    for result in current["results"]:
+        old = previous_results.get(_case_key(result))
+        if old is None:
+            continue
+        speedup = result["edges_per_second"] / old["edges_per_second"]
+        print(f"{' '.join(map(str, _case_key(result))):<110} {speedup:>8.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--graphs", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 300])
+    parser.add_argument(
+        "--calculators",
+        nargs="+",
+        default=["FormanRicciCurvature", "OllivierRicciCurvature"],
+    )
+    parser.add_argument("--dist-types", nargs="+", default=DIST_TYPES, choices=DIST_TYPES)
+    parser.add_argument("--methods", nargs="+", default=METHODS, choices=METHODS)
+    parser.add_argument(
+        "--weight-path-matrix",
+        nargs="+",
+        type=lambda value: value.lower() == "true",
+        default=WEIGHT_PATH_MATRIX,
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory runs")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", help="JSON output of a previous run to compare against")
+    args = parser.parse_args(argv)
+
+    output = run(args)
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), output)
+
+
+if __name__ == "__main__":
+    main()
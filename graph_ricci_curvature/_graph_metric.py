@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+import heapq
 import networkx as nx
 import numpy as np
+import scipy.sparse as sp
 import sys
 
 
@@ -14,14 +16,20 @@ class _GraphMetric(ABC):
         Input graph
     weight_key : str
         key to specify edge weights in networkx dictionary
+    copy : bool
+        If True, work on a copy of G with missing weights set to one. If
+        False, G is used as is and never modified: missing weights are treated
+        as one without being set and results are not written to it.
 
     """
 
-    def __init__(self, G: nx.Graph, edge_weight_key, node_weight_key):
-        self.G = G.copy()
+    def __init__(self, G: nx.Graph, edge_weight_key, node_weight_key, copy=True):
+        self.G = G.copy() if copy else G
+        self._copy = copy
         self.edge_weight_key = edge_weight_key
         self.node_weight_key = node_weight_key
         self._validate()
+        self._build_csr()
 
     def _validate(self):
         """
@@ -37,6 +45,10 @@ class _GraphMetric(ABC):
         if len(self.G.edges()) == 0:
             raise ValueError("Graph has no edges!")
 
+        # weights missing from an uncopied graph are read as one in _build_csr
+        if not self._copy:
+            return
+
         if not nx.get_edge_attributes(self.G, self.edge_weight_key):
             sys.stderr.write(
                 "No edge weights detected, setting edge weights to one with edge_weight_key = weight\n"
@@ -56,30 +68,281 @@ class _GraphMetric(ABC):
     def _set_node_weights(self, key):
         nx.set_node_attributes(self.G, {node: 1.0 for node in self.G.nodes()}, key)
 
+    def _build_csr(self):
+        """
+        Build a compact array representation of self.G used by the curvature
+        calculations. Nodes are given integer ids by their position in
+        self.G.nodes() and the adjacency is stored in compressed sparse row
+        format: the neighbors of node i are
+        self._indices[self._indptr[i] : self._indptr[i + 1]] with edge weights
+        in the same slots of self._weights. Neighbors are kept in the order
+        networkx reports them. Edges are given integer ids by their position
+        in self.G.edges() (edges added afterwards are appended) and
+        self._slot_edges holds the edge id of every slot.
+
+        """
+        self._nodes = list(self.G.nodes())
+        self._node_index = {node: i for i, node in enumerate(self._nodes)}
+        self._node_weights = np.array(
+            [self.G.nodes[node].get(self.node_weight_key, 1.0) for node in self._nodes],
+            dtype=np.float64,
+        )
+
+        indptr = np.zeros(len(self._nodes) + 1, dtype=np.int32)
+        indices = []
+        weights = []
+        slot_edges = []
+        edges = []
+        edge_ids = {}
+        for i, node in enumerate(self._nodes):
+            for neighbor, data in self.G._adj[node].items():
+                j = self._node_index[neighbor]
+                indices.append(j)
+                weights.append(data.get(self.edge_weight_key, 1.0))
+                # networkx reports an edge from whichever endpoint comes first
+                if j >= i:
+                    edge_ids[(i, j)] = len(edges)
+                    edges.append((i, j))
+                slot_edges.append(edge_ids[(j, i) if j < i else (i, j)])
+            indptr[i + 1] = len(indices)
+
+        self._indptr = indptr
+        self._indices = np.array(indices, dtype=np.int32)
+        self._weights = np.array(weights, dtype=np.float64)
+        self._slot_edges = np.array(slot_edges, dtype=np.int32)
+        self._edges = np.array(edges, dtype=np.int32).reshape(-1, 2)
+        self._build_adjacency()
+
+    def _build_adjacency(self):
+        # boolean adjacency pattern sharing the index arrays, for neighborhood searches
+        self._adjacency = sp.csr_array(
+            (np.ones(len(self._indices), dtype=bool), self._indices, self._indptr),
+            shape=(len(self._nodes), len(self._nodes)),
+        )
+
+    def _insert_edge(self, source_node, target_node, weight):
+        """
+        Add an edge to self.G and the compact arrays without rebuilding them.
+        Nodes not yet in the graph are added with node weight 1.0 and the new
+        edge is given the next integer edge id. An uncopied self.G is left
+        unchanged.
+
+        """
+        for node in (source_node, target_node):
+            if node not in self._node_index:
+                if self._copy:
+                    self.G.add_node(node, **{self.node_weight_key: 1.0})
+                self._node_index[node] = len(self._nodes)
+                self._nodes.append(node)
+                self._node_weights = np.append(self._node_weights, 1.0)
+                self._indptr = np.append(self._indptr, self._indptr[-1])
+        if self._copy:
+            self.G.add_edge(source_node, target_node, **{self.edge_weight_key: weight})
+
+        source = self._node_index[source_node]
+        target = self._node_index[target_node]
+        edge_id = len(self._edges)
+        self._edges = np.append(
+            self._edges, np.array([[source, target]], dtype=np.int32), axis=0
+        )
+        # networkx appends the new neighbor to the end of each adjacency
+        for node, neighbor in {(source, target), (target, source)}:
+            slot = self._indptr[node + 1]
+            self._indices = np.insert(self._indices, slot, neighbor)
+            self._weights = np.insert(self._weights, slot, weight)
+            self._slot_edges = np.insert(self._slot_edges, slot, edge_id)
+            self._indptr[node + 1 :] += 1
+        self._build_adjacency()
+
+    def _delete_edge(self, source_node, target_node):
+        """
+        Remove an edge from self.G and the compact arrays without rebuilding
+        them. Integer ids of edges after the removed edge shift down by one.
+        An uncopied self.G is left unchanged.
+
+        Returns
+        -------
+        integer id the removed edge had
+
+        """
+        if self._copy:
+            self.G.remove_edge(source_node, target_node)
+        source = self._node_index[source_node]
+        target = self._node_index[target_node]
+        edge_id = self._slot_edges[self._get_edge_slot(source, target)]
+        for node, neighbor in {(source, target), (target, source)}:
+            slot = self._get_edge_slot(node, neighbor)
+            self._indices = np.delete(self._indices, slot)
+            self._weights = np.delete(self._weights, slot)
+            self._slot_edges = np.delete(self._slot_edges, slot)
+            self._indptr[node + 1 :] -= 1
+        self._slot_edges[self._slot_edges > edge_id] -= 1
+        self._edges = np.delete(self._edges, edge_id, axis=0)
+        self._build_adjacency()
+        return edge_id
+
+    def _update_edge_weight(self, source_node, target_node, weight):
+        """
+        Change the weight of an edge in self.G and the compact arrays. An
+        uncopied self.G is left unchanged.
+
+        """
+        source = self._node_index[source_node]
+        target = self._node_index[target_node]
+        self._weights[self._get_edge_slot(source, target)] = weight
+        self._weights[self._get_edge_slot(target, source)] = weight
+        if self._copy:
+            self.G[source_node][target_node][self.edge_weight_key] = weight
+
+    def _has_edge(self, source_node, target_node):
+        """
+        Whether the compact graph has an edge between two nodes
+
+        """
+        if source_node not in self._node_index or target_node not in self._node_index:
+            return False
+        return bool(
+            (
+                self._get_neighbors(self._node_index[source_node])
+                == self._node_index[target_node]
+            ).any()
+        )
+
+    def _incident_edges(self, nodes):
+        """
+        Sorted integer ids of the edges incident to any of nodes
+
+        """
+        return np.unique(
+            np.concatenate(
+                [self._slot_edges[self._indptr[node] : self._indptr[node + 1]] for node in nodes]
+                + [np.empty(0, dtype=self._slot_edges.dtype)]
+            )
+        )
+
+    def _edge_labels(self, edge_ids=None):
+        """
+        Edges as (source, target) tuples of networkx node labels
+
+        Parameters
+        ----------
+        edge_ids : array
+            integer ids of edges. Default: all edges.
+
+        """
+        edges = self._edges if edge_ids is None else self._edges[edge_ids]
+        return [(self._nodes[source], self._nodes[target]) for source, target in edges.tolist()]
+
     def _get_neighbors(self, node):
-        return list(self.G.neighbors(node))
+        """
+        Integer ids of the neighbors of the node with integer id node. Returns a
+        view of self._indices rather than a new list.
+
+        """
+        return self._indices[self._indptr[node] : self._indptr[node + 1]]
+
+    def _get_neighbor_weights(self, node):
+        """
+        Weights of the edges between the node with integer id node and its
+        neighbors, in the same order as _get_neighbors.
+
+        """
+        return self._weights[self._indptr[node] : self._indptr[node + 1]]
+
+    def _get_edge_slot(self, source, target):
+        """
+        Position in self._indices of target in the neighbors of source
 
-    def _calculate_weight_sum(self, node, neighbors):
+        """
+        slots = np.flatnonzero(self._get_neighbors(source) == target)
+        if len(slots) == 0:
+            raise KeyError(
+                f"The edge {self._nodes[source]}-{self._nodes[target]} is not in the graph."
+            )
+        return self._indptr[source] + slots[0]
+
+    def _get_edge_slots(self, sources, targets):
+        """
+        Positions in self._indices of every target in the neighbors of its
+        source, like _get_edge_slot for arrays of integer node ids. Only the
+        rows of the sources are read.
+
+        """
+        sources = np.asarray(sources, dtype=np.int64).reshape(-1)
+        targets = np.asarray(targets, dtype=np.int64).reshape(-1)
+        rows, row_of = np.unique(sources, return_inverse=True)
+        slots, counts = self._row_slots(rows)
+        # (row, neighbor) pairs as single keys to search for every (source, target)
+        keys = np.repeat(np.arange(len(rows)), counts) * len(self._nodes) + self._indices[slots]
+        wanted = row_of.reshape(-1) * len(self._nodes) + targets
+        order = np.argsort(keys, kind="stable")
+        positions = np.searchsorted(keys, wanted, sorter=order)
+        found = order[np.minimum(positions, len(keys) - 1)] if len(keys) else positions
+        missing = positions >= len(keys)
+        missing[~missing] = keys[found[~missing]] != wanted[~missing]
+        if missing.any():
+            first = np.flatnonzero(missing)[0]
+            raise KeyError(
+                f"The edge {self._nodes[sources[first]]}-{self._nodes[targets[first]]} is not in the graph."
+            )
+        return slots[found]
+
+    def _row_slots(self, rows):
+        """
+        Positions in self._indices of the neighbors of every node in rows,
+        concatenated in the order of rows, and the number of neighbors of each
+
+        """
+        starts = self._indptr[rows].astype(np.int64)
+        counts = self._indptr[np.asarray(rows) + 1] - starts
+        slots = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return slots, counts
+
+    def _get_edge_id(self, source, target):
+        return self._slot_edges[self._get_edge_slot(source, target)]
+
+    def _edge_slots(self):
+        """
+        Position in self._indices of the first slot of every edge, ordered by
+        integer edge id
+
+        """
+        # one slot of each edge lies in the row of its lower id endpoint
+        rows = np.repeat(np.arange(len(self._nodes)), np.diff(self._indptr))
+        lower = np.flatnonzero(rows <= self._indices)
+        slots = np.empty(len(self._edges), dtype=np.int64)
+        slots[self._slot_edges[lower]] = lower
+        return slots
+
+    def _get_edge_weight(self, source, target):
+        return self._weights[self._get_edge_slot(source, target)]
+
+    def _calculate_weight_sum(self, node):
         """
         Calculate sum of weights of edges connected to a given node.
 
         """
-        return sum(
-            [self.G[node][neighbor][self.edge_weight_key] for neighbor in neighbors]
-        )
+        return self._get_neighbor_weights(node).sum()
 
     def _get_shortest_path_matrix(self, source_neighborhood, target_neighborhood, weight_path_matrix):
         """
         Find shortest distance between every node in source neighborhood
         (attached to source node by one edge) and every node in target
-        neighborhood
+        neighborhood. Unweighted distances are found for the whole
+        neighborhoods at once (see _get_hop_path_matrix). Weighted distances
+        come from one Dijkstra search from each node of the smaller
+        neighborhood rather than one per pair of nodes. The search from the
+        last node of the neighborhood (its center, for mass distributions)
+        runs first, and by the triangle inequality every other search can
+        stop at the distance to that node plus its distance to the furthest
+        target, or once every target is reached.
 
         Parameters
         ----------
-        source_neighborhood : list
-            list of node index values (ints or tuples) of a source node and its neighbors
-        target_neighborhood : list
-            list of node index values (ints or tuples) of a source node and its neighbors
+        source_neighborhood : array
+            integer ids of a source node and its neighbors
+        target_neighborhood : array
+            integer ids of a target node and its neighbors
         weight_path_matrix : bool
             When True, use edge weights when calculating shortest distance matrix. Default: False.
 
@@ -90,21 +353,153 @@ class _GraphMetric(ABC):
         neighborhood
 
         """
-        if weight_path_matrix:
-            key = self.edge_weight_key
-        else:
-            key = None
-        return np.array(
-            [
-                [
-                    nx.shortest_path_length(
-                        self.G, source, target, weight=key
-                    )
-                    for target in target_neighborhood
-                ]
-                for source in source_neighborhood
-            ]
-        )
+        if not weight_path_matrix:
+            return self._get_hop_path_matrix(source_neighborhood, target_neighborhood)
+
+        if len(target_neighborhood) < len(source_neighborhood):
+            return self._get_shortest_path_matrix(
+                target_neighborhood, source_neighborhood, weight_path_matrix
+            ).T
+
+        path_matrix = np.empty((len(source_neighborhood), len(target_neighborhood)))
+        sources = np.asarray(source_neighborhood).tolist()
+        targets = np.asarray(target_neighborhood).tolist()
+        if not sources or not targets:
+            return path_matrix
+
+        anchor = sources[-1]
+        anchor_lengths = self._dijkstra_path_lengths(anchor, targets=sources + targets)
+        path_matrix[-1] = self._lookup_path_lengths(anchor, targets, anchor_lengths)
+        furthest_target = path_matrix[-1].max()
+        for i, source in enumerate(sources[:-1]):
+            self._lookup_path_lengths(anchor, [source], anchor_lengths)
+            lengths = self._dijkstra_path_lengths(
+                source, cutoff=anchor_lengths[source] + furthest_target, targets=targets
+            )
+            path_matrix[i] = self._lookup_path_lengths(source, targets, lengths)
+        return path_matrix
+
+    def _get_hop_path_matrix(self, source_neighborhood, target_neighborhood):
+        """
+        Unweighted shortest path matrix between two neighborhoods from a
+        multi-source search bounded at 3 hops, which covers every pair of nodes
+        in the neighborhoods of adjacent nodes. Pairs connected by a path of
+        length 1 or 2 are found from the adjacency rows of the neighborhoods
+        and pairs of length 3 from the adjacency between their neighbors.
+        Pairs further apart, which only occur when the neighborhoods are not
+        adjacent, fall back to an unbounded breadth first search.
+
+        """
+        sources = np.asarray(source_neighborhood)
+        targets = np.asarray(target_neighborhood)
+        source_rows = self._adjacency[sources]
+        target_rows = self._adjacency[targets]
+
+        path_matrix = np.full((len(sources), len(targets)), 3.0)
+        path_matrix[(source_rows @ target_rows.T).toarray()] = 2
+        path_matrix[source_rows[:, targets].toarray()] = 1
+        path_matrix[sources[:, None] == targets[None, :]] = 0
+
+        unresolved = path_matrix == 3
+        if unresolved.any():
+            source_reach = np.unique(source_rows.indices)
+            target_reach = np.unique(target_rows.indices)
+            three_hops = (
+                source_rows[:, source_reach]
+                @ self._adjacency[source_reach][:, target_reach]
+                @ target_rows[:, target_reach].T
+            ).toarray()
+            for i in np.flatnonzero((unresolved & ~three_hops).any(axis=1)):
+                lengths = self._bfs_path_lengths(sources[i])
+                path_matrix[i] = self._lookup_path_lengths(
+                    sources[i], targets.tolist(), lengths
+                )
+        return path_matrix
+
+    def _lookup_path_lengths(self, source, targets, lengths):
+        """
+        Path lengths from source to every node of targets from a dictionary of
+        path lengths, raising if a target was not reached
+
+        """
+        for target in targets:
+            if target not in lengths:
+                raise nx.NetworkXNoPath(
+                    f"Node {self._nodes[target]} not reachable from {self._nodes[source]}"
+                )
+        return [lengths[target] for target in targets]
+
+    def _bfs_path_lengths(self, source, cutoff=None):
+        """
+        Unweighted shortest path lengths from a source node to all nodes
+        reachable from it within cutoff hops.
+
+        Returns
+        -------
+        dictionary keyed by integer node ids with shortest path lengths as values
+
+        """
+        lengths = {source: 0}
+        frontier = [source]
+        depth = 0
+        while frontier and (cutoff is None or depth < cutoff):
+            depth += 1
+            reached = np.unique(
+                np.concatenate([self._get_neighbors(node) for node in frontier])
+            )
+            frontier = [node for node in reached.tolist() if node not in lengths]
+            lengths.update((node, depth) for node in frontier)
+        return lengths
+
+    def _dijkstra_path_lengths(self, source, cutoff=None, targets=None):
+        """
+        Weighted shortest path lengths from a source node to all nodes
+        reachable from it using a binary heap over the compact arrays.
+
+        Parameters
+        ----------
+        source : int
+            integer id of the source node
+        cutoff : float
+            Paths longer than cutoff are not followed. Default: None.
+        targets : list
+            integer ids of nodes. If given, the search stops once all of them
+            have been reached. Default: None.
+
+        Returns
+        -------
+        dictionary keyed by integer node ids with shortest path lengths as values
+
+        """
+        if cutoff is not None:
+            # the bound may be summed in a different order than the path
+            cutoff += 1e-9 * max(1.0, cutoff)
+        remaining = None if targets is None else set(targets)
+        lengths = {}
+        tentative = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            length, node = heapq.heappop(heap)
+            if node in lengths:
+                continue
+            lengths[node] = length
+            if remaining is not None:
+                remaining.discard(node)
+                if not remaining:
+                    break
+            for neighbor, weight in zip(
+                self._get_neighbors(node).tolist(),
+                self._get_neighbor_weights(node).tolist(),
+            ):
+                new_length = length + weight
+                if cutoff is not None and new_length > cutoff:
+                    continue
+                if neighbor not in lengths and new_length < tentative.get(
+                    neighbor, np.inf
+                ):
+                    tentative[neighbor] = new_length
+                    heapq.heappush(heap, (new_length, neighbor))
+        return lengths
 
     def _check_directed(self):
         # this function will be removed when support for directed graphs is added
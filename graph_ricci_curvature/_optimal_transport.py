@@ -0,0 +1,95 @@
+import numpy as np
+
+
+def batched_sinkhorn2(a, b, M, reg, numItermax=1000, stopThr=1e-9, warmstart=None, log=False):
+    """
+    Sinkhorn-Knopp iterations run on a batch of entropy regularized optimal
+    transport problems at once. Follows ot.sinkhorn2 (ot.bregman.sinkhorn_knopp)
+    but on 3-D arrays, so problems of different sizes must be padded with zero
+    mass rows and columns. Each problem stops iterating once its own marginal
+    error falls below stopThr.
+
+    Parameters
+    ----------
+    a : numpy array
+        source distributions of shape (batch, dim_a)
+    b : numpy array
+        target distributions of shape (batch, dim_b)
+    M : numpy array
+        cost matrices of shape (batch, dim_a, dim_b)
+    reg : float
+        Regularization term
+    numItermax : int
+        Maximum number of iterations
+    stopThr : float
+        Stop threshold on the error of the target marginal
+    warmstart : tuple of numpy arrays
+        Initial scaling vectors (u, v) of shapes (batch, dim_a) and (batch, dim_b),
+        e.g. from a previous solve of similar problems
+    log : bool
+        If True, also return the final scaling vectors
+
+    Returns
+    -------
+    numpy array of shape (batch,) with the transport cost of each problem, and
+    the scaling vectors u and v if log is True
+
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    M = np.asarray(M, dtype=np.float64)
+
+    K = np.exp(-M / reg)
+    if warmstart is None:
+        u = (a > 0) / (a > 0).sum(axis=1, keepdims=True)
+        v = (b > 0) / (b > 0).sum(axis=1, keepdims=True)
+    else:
+        u, v = (np.array(scaling, dtype=np.float64) for scaling in warmstart)
+    loss = np.empty(len(a))
+    final_u = np.empty_like(u)
+    final_v = np.empty_like(v)
+
+    # indices into the full batch of the problems still iterating
+    active = np.arange(len(a))
+    for ii in range(numItermax):
+        uprev, vprev = u, v
+        KtransposeU = np.einsum("kij,ki->kj", K, u)
+        v = np.divide(b, KtransposeU, out=np.zeros_like(b), where=b > 0)
+        Kv = np.einsum("kij,kj->ki", K, v)
+        u = np.divide(a, Kv, out=np.zeros_like(a), where=a > 0)
+
+        failed = (
+            ((KtransposeU == 0) & (b > 0)).any(axis=1)
+            | ~np.isfinite(u).all(axis=1)
+            | ~np.isfinite(v).all(axis=1)
+        )
+        if failed.any():
+            # numerical errors, keep the previous iterate of those problems
+            u[failed], v[failed] = uprev[failed], vprev[failed]
+
+        if ii % 10 == 0 or ii == numItermax - 1:
+            marginal = np.einsum("ki,kij,kj->kj", u, K, v)
+            done = (np.linalg.norm(marginal - b, axis=1) < stopThr) | failed
+            if ii == numItermax - 1:
+                done[:] = True
+            if done.any():
+                loss[active[done]] = np.einsum(
+                    "ki,kij,kj,kij->k", u[done], K[done], v[done], M[done]
+                )
+                final_u[active[done]] = u[done]
+                final_v[active[done]] = v[done]
+                keep = ~done
+                active, a, b, M, K, u, v = (
+                    active[keep],
+                    a[keep],
+                    b[keep],
+                    M[keep],
+                    K[keep],
+                    u[keep],
+                    v[keep],
+                )
+                if len(active) == 0:
+                    break
+    if log:
+        return loss, final_u, final_v
+    return loss
@@ -0,0 +1,89 @@
+import time
+from collections import Counter
+
+
+class CurvatureProfiler:
+    """
+    Per-stage timers, call counters and histograms of problem sizes for a
+    curvature calculator. The profiler wraps the stage methods of the
+    calculator it is attached to with timed versions set as instance
+    attributes, so calculators without a profiler run their methods unchanged.
+    Only work done in the calculator's own process is timed; with n_jobs > 1
+    stage timings stay empty but progress is still reported.
+
+    Parameters
+    ----------
+    progress_callback : callable
+        Called as progress_callback(completed_edges, total_edges) while edges
+        are calculated. Default: None.
+    progress_interval : int
+        Number of edges between progress callbacks when running serially.
+        Default: 1000.
+
+    """
+
+    # stage name -> calculator methods timed as that stage
+    STAGES = {
+        "mass_distribution": ["_mass_distribution"],
+        "path_matrix": ["_get_shortest_path_matrix"],
+        "closed_form": ["_tree_like_transport_distance"],
+        "ot_solve": ["_solve_transport", "_solve_sinkhorn_batch"],
+        "edge_curvature": ["_calculate_all_edge_curvatures"],
+        "node_contraction": ["_calculate_node_curvatures", "_calculate_node_curvature"],
+    }
+
+    def __init__(self, progress_callback=None, progress_interval=1000):
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.reset()
+
+    def reset(self):
+        self.times = dict.fromkeys(self.STAGES, 0.0)
+        self.calls = dict.fromkeys(self.STAGES, 0)
+        self.neighborhood_sizes = Counter()
+        self.transport_shapes = Counter()
+
+    def attach(self, calculator):
+        for stage, names in self.STAGES.items():
+            for name in names:
+                if hasattr(calculator, name):
+                    setattr(calculator, name, self._timed(stage, getattr(calculator, name)))
+
+    def detach(self, calculator):
+        for names in self.STAGES.values():
+            for name in names:
+                calculator.__dict__.pop(name, None)
+
+    def report(self):
+        """
+        Summary of the profiled calculations
+
+        Returns
+        -------
+        dictionary with cumulative seconds and number of calls of each stage,
+        a histogram of neighborhood sizes (number of nodes in the mass
+        distribution) and a histogram of optimal transport problem shapes
+
+        """
+        return {
+            "seconds": {stage: t for stage, t in self.times.items() if self.calls[stage]},
+            "calls": {stage: n for stage, n in self.calls.items() if n},
+            "neighborhood_sizes": dict(sorted(self.neighborhood_sizes.items())),
+            "transport_shapes": dict(sorted(self.transport_shapes.items())),
+        }
+
+    def _timed(self, stage, method):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            self.times[stage] += time.perf_counter() - start
+            self.calls[stage] += 1
+            if stage == "mass_distribution":
+                self.neighborhood_sizes[len(result[1])] += 1
+            elif method.__name__ == "_solve_transport":
+                self.transport_shapes[args[2].shape] += 1
+            elif method.__name__ == "_solve_sinkhorn_batch":
+                self.transport_shapes.update(problem[-1].shape for problem in args[0])
+            return result
+
+        return timed
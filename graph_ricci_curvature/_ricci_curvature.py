@@ -1,5 +1,119 @@
+import hashlib
+import json
+import math
 import networkx as nx
+import numpy as np
+import os
+import scipy.sparse as sp
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from statistics import NormalDist
 from graph_ricci_curvature._graph_metric import _GraphMetric
+from graph_ricci_curvature._profiler import CurvatureProfiler
+from graph_ricci_curvature.curvature_series import CurvatureSeries
+from graph_ricci_curvature.curvature_store import CurvatureStore
+
+# calculator object held by each worker process, set once by _init_worker so
+# the graph is not pickled with every task
+_worker_calculator = None
+
+
+def _init_worker(calculator):
+    global _worker_calculator
+    _worker_calculator = calculator
+
+
+def _calculate_edge_chunk(edges, edge_kwargs):
+    return _worker_calculator._calculate_edge_chunk(edges, **edge_kwargs)
+
+
+class _EdgeCurvatureView(Mapping):
+    """
+    Read-only mapping from (source, target) edges to curvature, backed by the
+    edge curvature array of a calculator, or by another array of the
+    calculator indexed by integer edge id whose rows become tuples
+
+    """
+
+    def __init__(self, calculator, array="_edge_curvature"):
+        self._calculator = calculator
+        self._array = array
+
+    def __getitem__(self, edge):
+        calculator = self._calculator
+        if not calculator._has_edge(*edge):
+            raise KeyError(edge)
+        source = calculator._node_index[edge[0]]
+        target = calculator._node_index[edge[1]]
+        value = getattr(calculator, self._array)[calculator._get_edge_id(source, target)]
+        return float(value) if np.ndim(value) == 0 else tuple(value.tolist())
+
+    def __iter__(self):
+        return iter(self._calculator._edge_labels())
+
+    def __len__(self):
+        return len(self._calculator._edges)
+
+
+class _LazyEdgeCurvature(Mapping):
+    """
+    Mapping from (source, target) edges to curvature that calculates the
+    curvature of an edge the first time it is looked up, with the arguments of
+    the last calculate_ricci_curvature call, and keeps it in the edge
+    curvature array of the calculator
+
+    """
+
+    def __init__(self, calculator):
+        self._calculator = calculator
+
+    def __getitem__(self, edge):
+        calculator = self._calculator
+        if not calculator._has_edge(*edge):
+            raise KeyError(edge)
+        if calculator._edge_curvature is None:
+            calculator._edge_curvature = np.full(len(calculator._edges), np.nan)
+            calculator._node_curvature = np.full(len(calculator._nodes), np.nan)
+            calculator._graph_curvature = (math.nan, math.nan)
+
+        edge_id = calculator._get_edge_id(
+            calculator._node_index[edge[0]], calculator._node_index[edge[1]]
+        )
+        curvature = calculator._edge_curvature[edge_id]
+        if np.isnan(curvature):
+            curvature = calculator._calculate_edges(
+                [tuple(edge)], **calculator._curvature_kwargs
+            )[tuple(edge)]
+            calculator._edge_curvature[edge_id] = curvature
+            if calculator._copy:
+                calculator.G[edge[0]][edge[1]]["ricci_curvature"] = curvature
+        return float(curvature)
+
+    def __iter__(self):
+        return iter(self._calculator._edge_labels())
+
+    def __len__(self):
+        return len(self._calculator._edges)
+
+
+class _NodeCurvatureView(Mapping):
+    """
+    Read-only mapping from nodes to scalar curvature, backed by the node
+    curvature array of a calculator
+
+    """
+
+    def __init__(self, calculator):
+        self._calculator = calculator
+
+    def __getitem__(self, node):
+        return float(self._calculator._node_curvature[self._calculator._node_index[node]])
+
+    def __iter__(self):
+        return iter(self._calculator._nodes)
+
+    def __len__(self):
+        return len(self._calculator._nodes)
 
 
 class _RicciCurvature(_GraphMetric):
@@ -12,11 +126,962 @@ class _RicciCurvature(_GraphMetric):
         Input graph
     weight_key : str
         key to specify edge weights in networkx dictionary. Default = weight
+    copy : bool
+        If False, G is not copied or modified and results are only available
+        from edge_curvature, node_curvature and graph_curvature. Default = True
 
     """
 
-    def __init__(self, G: nx.Graph, edge_weight_key="weight", node_weight_key="weight"):
-        super().__init__(G, edge_weight_key, node_weight_key)
+    def __init__(
+        self, G: nx.Graph, edge_weight_key="weight", node_weight_key="weight", copy=True
+    ):
+        super().__init__(G, edge_weight_key, node_weight_key, copy)
+        self._edge_curvature = None
+        self._node_curvature = None
+        self._graph_curvature = None
+        # arguments of the last calculate_ricci_curvature call, reused by updates
+        self._curvature_kwargs = {}
+        self._norm = True
+        self._profiler = None
+
+    def __getstate__(self):
+        # timed stage wrappers are closures and stay with the profiling process
+        state = self.__dict__.copy()
+        if self._profiler is not None:
+            for names in CurvatureProfiler.STAGES.values():
+                for name in names:
+                    state.pop(name, None)
+            state["_profiler"] = None
+        return state
+
+    @property
+    def profiler(self):
+        """
+        CurvatureProfiler collecting stage timings, or None if profiling is
+        disabled
+
+        """
+        return self._profiler
+
+    def enable_profiling(self, progress_callback=None, progress_interval=1000):
+        """
+        Time the stages of curvature calculations (mass distribution, path
+        matrix, closed form shortcut, optimal transport solve, edge curvature
+        and node contraction), count their calls and record histograms of
+        neighborhood sizes and optimal transport problem shapes. Calculations
+        without profiling enabled are not slowed down.
+
+        Parameters
+        ----------
+        progress_callback : callable
+            Called as progress_callback(completed_edges, total_edges) while
+            edges are calculated. Default: None.
+        progress_interval : int
+            Number of edges between progress callbacks when running serially.
+            Default: 1000.
+
+        Returns
+        -------
+        CurvatureProfiler, whose report() summarizes the profiled calculations
+
+        """
+        self.disable_profiling()
+        self._profiler = CurvatureProfiler(progress_callback, progress_interval)
+        self._profiler.attach(self)
+        return self._profiler
+
+    def disable_profiling(self):
+        """
+        Stop profiling and restore the untimed stage methods
+
+        """
+        if self._profiler is not None:
+            self._profiler.detach(self)
+            self._profiler = None
+
+    @property
+    def edge_curvature(self):
+        """
+        Mapping from (source, target) edges to Ricci curvature, read from the
+        internal curvature arrays rather than graph attributes
+
+        """
+        self._check_calculated()
+        return _EdgeCurvatureView(self)
+
+    @property
+    def node_curvature(self):
+        """
+        Mapping from nodes to scalar Ricci curvature, read from the internal
+        curvature arrays rather than graph attributes
+
+        """
+        self._check_calculated()
+        return _NodeCurvatureView(self)
+
+    @property
+    def graph_curvature(self):
+        """
+        Tuple of unnormalized and normalized graph Ricci curvature
+
+        """
+        self._check_calculated()
+        return self._graph_curvature
+
+    @property
+    def curvature(self):
+        """
+        Mapping from (source, target) edges to Ricci curvature that calculates
+        an edge only when it is first looked up and remembers it. Uses the
+        arguments of the last calculate_ricci_curvature call, or the defaults
+        if it has not been called.
+
+        """
+        return _LazyEdgeCurvature(self)
+
+    def save_curvature(self, path):
+        """
+        Write edge, node and graph curvature to memory mapped .npy files that
+        can be opened without copying by other processes
+
+        Parameters
+        ----------
+        path : str
+            Directory to write to. Created if it does not exist.
+
+        Returns
+        -------
+        CurvatureStore opened on path. Use CurvatureStore(path).attach(G) to
+        set the stored curvature as attributes of a networkx graph.
+
+        """
+        return CurvatureStore.write(self, path)
+
+    @classmethod
+    def curvature_series(
+        cls, graphs, edge_weight_key="weight", node_weight_key="weight", norm=True, **kwargs
+    ):
+        """
+        Calculate curvature of a series of snapshots of a graph, e.g. of a
+        network observed over time. The first snapshot is calculated in full.
+        Every later snapshot is compared with the one before it and only the
+        edges whose curvature can change with the added, removed and
+        reweighted edges (as for add_edge, remove_edge and update_weight) or
+        with changed node weights are recalculated. The curvature of every
+        other edge is carried forward. Snapshots are neither copied nor
+        modified and missing weights are treated as 1.0.
+
+        Parameters
+        ----------
+        graphs : iterable
+            networkx graphs, e.g. a generator reading one snapshot at a time
+        edge_weight_key : str
+            Key to specify edge weights in networkx graph. Default = weight.
+        node_weight_key : str
+            Key to specify node weights in networkx graph. Default = weight.
+        norm : bool
+            If True, normalize nodal scalar curvature.
+        kwargs : dict
+            Arguments of calculate_ricci_curvature other than edges, nodes and
+            checkpoint. n_jobs only applies to the first snapshot.
+
+        Returns
+        -------
+        CurvatureSeries with time by edge, time by node and time by graph
+        curvature arrays
+
+        """
+        node_columns = {}
+        edge_columns = {}
+        edges = []
+        rows = []
+        recalculated_edges = []
+        calculator = None
+        for G in graphs:
+            if calculator is None:
+                calculator = cls(G, edge_weight_key, node_weight_key, copy=False)
+                calculator.calculate_ricci_curvature(norm=norm, **kwargs)
+                recalculated_edges.append(len(calculator._edges))
+            else:
+                recalculated_edges.append(calculator._apply_snapshot(G))
+            rows.append(calculator._series_row(node_columns, edge_columns, edges))
+        if calculator is None:
+            raise ValueError("No snapshots were given.")
+        return CurvatureSeries._from_rows(list(node_columns), edges, rows, recalculated_edges)
+
+    def _apply_snapshot(self, G):
+        """
+        Replace the graph by the next snapshot G of a series. Curvature of
+        edges that are in both graphs is kept and only edges that can be
+        affected by the differences are recalculated.
+
+        Returns
+        -------
+        number of recalculated edges
+
+        """
+        old_edge_ids = {}
+        for edge_id, (source, target) in enumerate(self._edge_labels()):
+            old_edge_ids[source, target] = old_edge_ids[target, source] = edge_id
+        kept = np.zeros(len(self._edges), dtype=bool)
+        for edge in G.edges():
+            edge_id = old_edge_ids.get(edge)
+            if edge_id is not None:
+                kept[edge_id] = True
+        # neighborhoods of removed edges are only known in the previous graph
+        affected = set()
+        for source, target in self._edges[~kept].tolist():
+            affected.update(
+                self._nodes[node] for node in self._affected_nodes(source, target).tolist()
+            )
+
+        old_weights = self._weights[self._edge_slots()]
+        old_node_weights = dict(zip(self._nodes, self._node_weights.tolist()))
+        old_node_curvature = dict(zip(self._nodes, self._node_curvature.tolist()))
+        old_edge_curvature = self._edge_curvature
+
+        self.G = G
+        self._validate()
+        self._build_csr()
+
+        previous = np.array(
+            [old_edge_ids.get(edge, -1) for edge in self._edge_labels()], dtype=np.int64
+        )
+        self._edge_curvature = np.where(
+            previous >= 0, old_edge_curvature[np.maximum(previous, 0)], np.nan
+        )
+        self._node_curvature = np.array(
+            [old_node_curvature.get(node, 0.0) for node in self._nodes], dtype=np.float64
+        )
+        self._graph_curvature = self._calculate_graph_curvature()
+
+        affected_nodes = {self._node_index[node] for node in affected if node in self._node_index}
+        changed = (previous < 0) | (
+            self._weights[self._edge_slots()] != old_weights[np.maximum(previous, 0)]
+        )
+        for source, target in self._edges[changed].tolist():
+            affected_nodes.update(self._affected_nodes(source, target).tolist())
+        for node, weight in zip(self._nodes, self._node_weights.tolist()):
+            if old_node_weights.get(node) != weight:
+                affected_nodes.add(self._node_index[node])
+
+        nodes = np.array(sorted(affected_nodes), dtype=np.int64)
+        self._update_curvature(nodes)
+        return len(self._incident_edges(nodes))
+
+    def _series_row(self, node_columns, edge_columns, edges):
+        """
+        Curvature of the current snapshot of a series with the columns of its
+        nodes and edges, adding columns for nodes and edges seen for the first
+        time
+
+        """
+        for node in self._nodes:
+            node_columns.setdefault(node, len(node_columns))
+        columns = []
+        for edge in self._edge_labels():
+            column = edge_columns.get(edge)
+            if column is None:
+                column = len(edges)
+                edges.append(edge)
+                edge_columns[edge] = edge_columns[edge[::-1]] = column
+            columns.append(column)
+        return (
+            [node_columns[node] for node in self._nodes],
+            self._node_curvature.copy(),
+            columns,
+            self._edge_curvature.copy(),
+            self._graph_curvature,
+        )
+
+    @classmethod
+    def curvature_batch(
+        cls,
+        graphs,
+        edge_weight_key="weight",
+        node_weight_key="weight",
+        norm=True,
+        batch_size=1024,
+        **kwargs,
+    ):
+        """
+        Calculate curvature of many small graphs, e.g. molecules, without the
+        overhead of a calculator object for each of them. Up to batch_size
+        graphs at a time are packed into their disjoint union, whose compact
+        arrays are block diagonal, and calculated with a single
+        calculate_ricci_curvature call. Graphs are neither copied nor modified,
+        missing weights are treated as 1.0 and graphs without edges have zero
+        curvature.
+
+        Parameters
+        ----------
+        graphs : iterable
+            networkx graphs
+        edge_weight_key : str
+            Key to specify edge weights in networkx graph. Default = weight.
+        node_weight_key : str
+            Key to specify node weights in networkx graph. Default = weight.
+        norm : bool
+            If True, normalize nodal scalar curvature.
+        batch_size : int
+            Maximum number of graphs calculated together. Default: 1024.
+        kwargs : dict
+            Arguments of calculate_ricci_curvature other than edges, nodes and
+            checkpoint, e.g. n_jobs to split the edges of each batch between
+            worker processes.
+
+        Yields
+        ------
+        dictionary for every graph, in order, with edge_curvature keyed by
+        (source, target) edges, node_curvature keyed by nodes and
+        graph_curvature, the tuple of unnormalized and normalized graph
+        curvature
+
+        """
+        batch = []
+        for G in graphs:
+            batch.append(G)
+            if len(batch) == batch_size:
+                yield from cls._calculate_batch(
+                    batch, edge_weight_key, node_weight_key, norm, kwargs
+                )
+                batch = []
+        if batch:
+            yield from cls._calculate_batch(batch, edge_weight_key, node_weight_key, norm, kwargs)
+
+    @classmethod
+    def _calculate_batch(cls, graphs, edge_weight_key, node_weight_key, norm, kwargs):
+        """
+        Calculate curvature of the disjoint union of graphs and split it into
+        the curvature of each graph. Nodes of the union are labeled
+        (position of graph, node), so the nodes and edges of every graph have
+        consecutive integer ids.
+
+        """
+        union = nx.Graph()
+        for k, G in enumerate(graphs):
+            if G.is_directed():
+                raise NotImplementedError(
+                    "Directed Graphs are not implemented. Set your graph to undirected with G.to_undirected()."
+                )
+            union.add_nodes_from(
+                ((k, node), {node_weight_key: weight})
+                for node, weight in G.nodes(data=node_weight_key, default=1.0)
+            )
+            union.add_edges_from(
+                ((k, source), (k, target), {edge_weight_key: weight})
+                for source, target, weight in G.edges(data=edge_weight_key, default=1.0)
+            )
+
+        node_counts = [len(G) for G in graphs]
+        if union.number_of_edges() == 0:
+            for G in graphs:
+                yield {
+                    "edge_curvature": {},
+                    "node_curvature": dict.fromkeys(G.nodes(), 0.0),
+                    "graph_curvature": (0.0, 0.0),
+                }
+            return
+
+        calculator = cls(union, edge_weight_key, node_weight_key, copy=False)
+        calculator.calculate_ricci_curvature(norm=norm, **kwargs)
+
+        node_offsets = np.concatenate(([0], np.cumsum(node_counts)))
+        edge_graphs = np.searchsorted(node_offsets, calculator._edges[:, 0], side="right") - 1
+        edge_offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(edge_graphs, minlength=len(graphs))))
+        )
+        node_graphs = np.repeat(np.arange(len(graphs)), node_counts)
+        graph_totals = np.bincount(
+            node_graphs, calculator._node_curvature, minlength=len(graphs)
+        ).tolist()
+
+        nodes = [node for _, node in calculator._nodes]
+        edge_labels = [
+            (nodes[source], nodes[target]) for source, target in calculator._edges.tolist()
+        ]
+        edge_curvature = calculator._edge_curvature.tolist()
+        node_curvature = calculator._node_curvature.tolist()
+        edge_offsets = edge_offsets.tolist()
+        node_offsets = node_offsets.tolist()
+        for k, total in enumerate(graph_totals):
+            edges = slice(edge_offsets[k], edge_offsets[k + 1])
+            graph_nodes = slice(node_offsets[k], node_offsets[k + 1])
+            yield {
+                "edge_curvature": dict(zip(edge_labels[edges], edge_curvature[edges])),
+                "node_curvature": dict(zip(nodes[graph_nodes], node_curvature[graph_nodes])),
+                "graph_curvature": (total, total / node_counts[k] if node_counts[k] else 0.0),
+            }
+
+    def iter_edge_curvature(self, chunk_size=1024, n_jobs=1, ordered=True, **edge_kwargs):
+        """
+        Generate the curvature of every edge as it is calculated, chunk_size
+        edges at a time, without storing it. Only a bounded number of chunks
+        are held in memory at once, so results can be written out while the
+        remaining edges are calculated.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Number of edges calculated together. Default: 1024.
+        n_jobs : int
+            Number of worker processes. -1 uses all available cores. Default: 1.
+        ordered : bool
+            If True, edges are generated in the order of self.G.edges().
+            Otherwise chunks are generated as soon as a worker finishes them.
+            Default: True.
+        edge_kwargs : dict
+            Arguments of calculate_edge_curvature (and batch_size for the
+            "sinkhorn-batch" method). Unset arguments are taken from the last
+            calculate_ricci_curvature call.
+
+        Yields
+        ------
+        (source, target, curvature) tuples
+
+        """
+        edge_kwargs = dict(self._curvature_kwargs, **edge_kwargs)
+        for edge_ids, results in self._iter_edge_chunks(
+            np.arange(len(self._edges)), chunk_size, n_jobs, ordered, edge_kwargs
+        ):
+            for (source, target), curvature in zip(self._edge_labels(edge_ids), results):
+                yield source, target, curvature
+
+    def estimate_graph_curvature(
+        self,
+        rel_error=0.05,
+        confidence=0.95,
+        max_edges=None,
+        min_samples=30,
+        norm=True,
+        seed=None,
+        n_jobs=1,
+        **edge_kwargs,
+    ):
+        """
+        Estimate graph curvature from a uniform random sample of nodes instead
+        of calculating every edge. Nodes are sampled without replacement and
+        only the edges incident to them are calculated. The sum of node
+        curvature is estimated by the number of nodes times the sample mean,
+        which is unbiased, with a normal confidence interval corrected for the
+        finite number of nodes. Nodes are added in rounds sized from the
+        sample variance until the half width of the interval is at most
+        rel_error times the estimate, max_edges edges have been calculated, or
+        every node has been sampled and the estimate is exact. While every
+        sampled node has the same curvature the variance is unknown and the
+        sample is doubled each round. Stored curvature and graph attributes
+        are not changed.
+
+        Parameters
+        ----------
+        rel_error : float
+            Target half width of the confidence interval relative to the
+            estimate. Default: 0.05.
+        confidence : float
+            Confidence level of the interval. Default: 0.95.
+        max_edges : int
+            Maximum number of edges to calculate. Default: None (no limit).
+        min_samples : int
+            Number of nodes sampled in the first round. Default: 30.
+        norm : bool
+            If True, normalize nodal scalar curvature.
+        seed : int
+            Seed of the random sample. Default: None.
+        n_jobs : int
+            Number of worker processes. -1 uses all available cores. Default: 1.
+        edge_kwargs : dict
+            Arguments of calculate_edge_curvature (and batch_size for the
+            "sinkhorn-batch" method). Unset arguments are taken from the last
+            calculate_ricci_curvature call.
+
+        Returns
+        -------
+        dictionary with the estimated unnormalized and normalized graph
+        curvature, their confidence intervals, the relative error reached,
+        the number of sampled nodes and the number of calculated edges
+
+        """
+        edge_kwargs = dict(self._curvature_kwargs, **edge_kwargs)
+        num_nodes = len(self._nodes)
+        order = np.random.default_rng(seed).permutation(num_nodes).tolist()
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        budget = math.inf if max_edges is None else max_edges
+
+        edge_curvature = np.full(len(self._edges), np.nan)
+        node_curvature = []
+        calculated_edges = 0
+        size = min(max(min_samples, 2), num_nodes)
+        while True:
+            # take nodes in sample order until the edges they need exceed the budget
+            nodes = []
+            pending = set()
+            for node in order[len(node_curvature) : size]:
+                edge_ids = self._slot_edges[self._indptr[node] : self._indptr[node + 1]]
+                missing = set(edge_ids[np.isnan(edge_curvature[edge_ids])].tolist()) - pending
+                if calculated_edges + len(pending) + len(missing) > budget:
+                    break
+                pending |= missing
+                nodes.append(node)
+            if pending:
+                edge_ids = np.array(sorted(pending), dtype=np.int64)
+                ricci_tensor = self._calculate_edges(
+                    self._edge_labels(edge_ids), n_jobs=n_jobs, **edge_kwargs
+                )
+                edge_curvature[edge_ids] = list(ricci_tensor.values())
+                calculated_edges += len(edge_ids)
+            node_curvature.extend(
+                self._calculate_node_curvature(node, norm, edge_curvature) for node in nodes
+            )
+            sampled = len(node_curvature)
+            if sampled == 0:
+                raise ValueError("max_edges is too small to calculate the curvature of any node.")
+
+            total = num_nodes * float(np.mean(node_curvature))
+            # a sample of equal values says nothing about the nodes it missed,
+            # so its variance is taken as unknown rather than zero
+            std = float(np.std(node_curvature, ddof=1)) if sampled > 1 else 0.0
+            if std == 0:
+                std = math.inf
+            if sampled == num_nodes:
+                half_width = 0.0
+            else:
+                half_width = z * num_nodes * std * math.sqrt((1 - sampled / num_nodes) / sampled)
+            # stop at the target error, once every node is sampled or at the budget
+            if half_width <= rel_error * abs(total) or sampled == num_nodes or sampled < size:
+                break
+            # sample size needed at the current variance, growing at most twofold
+            if total and math.isfinite(std):
+                needed = (z * num_nodes * std / (rel_error * abs(total))) ** 2
+                needed = math.ceil(needed / (1 + needed / num_nodes))
+            else:
+                needed = 2 * sampled
+            size = min(num_nodes, max(sampled + 1, min(needed, 2 * sampled)))
+
+        interval = (total - half_width, total + half_width)
+        if total:
+            relative_error = half_width / abs(total)
+        else:
+            relative_error = 0.0 if half_width == 0 else math.inf
+        return {
+            "graph_curvature": (total, total / num_nodes),
+            "confidence_interval": (
+                interval,
+                (interval[0] / num_nodes, interval[1] / num_nodes),
+            ),
+            "relative_error": relative_error,
+            "sampled_nodes": sampled,
+            "calculated_edges": calculated_edges,
+        }
+
+    def _iter_edge_chunks(self, edge_ids, chunk_size, n_jobs, ordered, edge_kwargs):
+        """
+        Calculate edges chunk_size at a time, serially or in a pool of worker
+        processes with at most 2 * n_jobs chunks submitted at once
+
+        Parameters
+        ----------
+        edge_ids : numpy array
+            integer ids of the edges to calculate
+        ordered : bool
+            If True, chunks are generated in the order of edge_ids, otherwise
+            as soon as they are finished
+
+        Yields
+        ------
+        (chunk edge ids, list of curvature values) tuples
+
+        """
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
+        if n_jobs < 1:
+            raise ValueError("n_jobs must be a positive integer or -1")
+        chunks = (
+            edge_ids[start : start + chunk_size]
+            for start in range(0, len(edge_ids), chunk_size)
+        )
+
+        if n_jobs == 1:
+            for chunk in chunks:
+                yield chunk, self._calculate_edge_chunk(
+                    self._edge_labels(chunk), **edge_kwargs
+                )
+            return
+
+        executor = ProcessPoolExecutor(
+            max_workers=n_jobs, initializer=_init_worker, initargs=(self,)
+        )
+        try:
+            # submitted chunks by future, in submission order
+            pending = {}
+            for chunk in chunks:
+                future = executor.submit(
+                    _calculate_edge_chunk, self._edge_labels(chunk), edge_kwargs
+                )
+                pending[future] = chunk
+                # keep workers busy without queueing every chunk
+                while len(pending) >= 2 * n_jobs:
+                    yield self._pop_edge_chunk(pending, ordered)
+            while pending:
+                yield self._pop_edge_chunk(pending, ordered)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _pop_edge_chunk(pending, ordered):
+        """
+        Wait for the first submitted chunk of pending (or any finished chunk,
+        if not ordered) and remove it
+
+        Returns
+        -------
+        (chunk edge ids, list of curvature values) tuple
+
+        """
+        if ordered:
+            future = next(iter(pending))
+        else:
+            future = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+        return pending.pop(future), future.result()
+
+    def _checkpoint_checksum(self, edge_kwargs):
+        """
+        sha256 digest of the compact graph and the arguments that change edge
+        curvature, identifying the calculation a checkpoint belongs to
+
+        """
+        digest = hashlib.sha256()
+        for array in (self._indptr, self._indices, self._weights, self._edges):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        parameters = {
+            key: value for key, value in edge_kwargs.items() if key != "numThreads"
+        }
+        digest.update(json.dumps(parameters, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _calculate_edges_checkpointed(
+        self, edge_ids, checkpoint, checkpoint_interval, n_jobs, edge_kwargs
+    ):
+        """
+        Calculate edges, writing the curvature of finished edges to a
+        checkpoint file every checkpoint_interval edges. Edges already in an
+        existing checkpoint of the same graph and arguments are not
+        calculated again.
+
+        Parameters
+        ----------
+        edge_ids : numpy array
+            integer ids of the edges to calculate
+        checkpoint : str
+            path of the checkpoint file (.npz)
+        checkpoint_interval : int
+            number of edges calculated between writes of the checkpoint
+
+        Returns
+        -------
+        numpy array of curvature of every edge ordered by integer edge id, NaN
+        for edges that are not in edge_ids
+
+        """
+        checksum = self._checkpoint_checksum(edge_kwargs)
+        curvature = np.full(len(self._edges), np.nan)
+        finished = np.zeros(len(self._edges), dtype=bool)
+        if os.path.exists(checkpoint):
+            with np.load(checkpoint) as saved:
+                if saved["checksum"].item() != checksum:
+                    raise ValueError(
+                        f"The checkpoint {checkpoint} was written for a different graph or different arguments. Remove it to start over."
+                    )
+                curvature, finished = saved["curvature"], saved["finished"]
+
+        def save():
+            # replace the checkpoint only once the new one is complete
+            with open(checkpoint + ".tmp", "wb") as f:
+                np.savez(f, checksum=np.array(checksum), curvature=curvature, finished=finished)
+            os.replace(checkpoint + ".tmp", checkpoint)
+
+        remaining = edge_ids[~finished[edge_ids]]
+        workers = os.cpu_count() if n_jobs == -1 else n_jobs
+        chunk_size = max(1, min(checkpoint_interval, -(-len(remaining) // (4 * workers))))
+        progress = None if self._profiler is None else self._profiler.progress_callback
+        unsaved = 0
+        for chunk, results in self._iter_edge_chunks(
+            remaining, chunk_size, n_jobs, False, edge_kwargs
+        ):
+            curvature[chunk] = results
+            finished[chunk] = True
+            unsaved += len(chunk)
+            if unsaved >= checkpoint_interval:
+                save()
+                unsaved = 0
+            if progress is not None:
+                progress(int(finished[edge_ids].sum()), len(edge_ids))
+        save()
+
+        edge_curvature = np.full(len(self._edges), np.nan)
+        edge_curvature[edge_ids] = curvature[edge_ids]
+        return edge_curvature
+
+    def _check_calculated(self):
+        if self._edge_curvature is None:
+            raise ValueError(
+                "Curvature has not been calculated. Call calculate_ricci_curvature first."
+            )
+
+    def add_edge(self, source_node, target_node, weight=1.0):
+        """
+        Add an edge to the graph. If curvature has been calculated, only the
+        edges whose curvature can change are recalculated (with the arguments
+        of the last calculate_ricci_curvature call) and node and graph
+        curvature are updated from them.
+
+        Parameters
+        ----------
+        source_node : int or tuple
+            index of source_node in graph self.G. Added if not in the graph.
+        target_node : int or tuple
+            index of target node in graph self.G. Added if not in the graph.
+        weight : float
+            weight of the new edge. Default: 1.0.
+
+        """
+        if self._has_edge(source_node, target_node):
+            raise ValueError(
+                f"The edge {source_node}-{target_node} is already in the graph."
+            )
+        self._insert_edge(source_node, target_node, weight)
+        if self._edge_curvature is not None:
+            new_nodes = len(self._nodes) - len(self._node_curvature)
+            self._edge_curvature = np.append(self._edge_curvature, np.nan)
+            self._node_curvature = np.append(self._node_curvature, np.zeros(new_nodes))
+            self._update_curvature(
+                self._affected_nodes(
+                    self._node_index[source_node], self._node_index[target_node]
+                )
+            )
+
+    def remove_edge(self, source_node, target_node):
+        """
+        Remove an edge from the graph. If curvature has been calculated, only
+        the edges whose curvature can change are recalculated and node and
+        graph curvature are updated from them.
+
+        Parameters
+        ----------
+        source_node : int or tuple
+            index of source_node in graph self.G
+        target_node : int or tuple
+            index of target node in graph self.G
+
+        """
+        if not self._has_edge(source_node, target_node):
+            raise ValueError(f"The edge {source_node}-{target_node} is not in the graph.")
+        # neighborhoods affected by the edge are found before it is removed
+        affected = self._affected_nodes(
+            self._node_index[source_node], self._node_index[target_node]
+        )
+        edge_id = self._delete_edge(source_node, target_node)
+        if self._edge_curvature is not None:
+            self._edge_curvature = np.delete(self._edge_curvature, edge_id)
+            self._update_curvature(affected)
+
+    def update_weight(self, source_node, target_node, weight):
+        """
+        Change the weight of an edge. If curvature has been calculated, only
+        the edges whose curvature can change are recalculated and node and
+        graph curvature are updated from them.
+
+        Parameters
+        ----------
+        source_node : int or tuple
+            index of source_node in graph self.G
+        target_node : int or tuple
+            index of target node in graph self.G
+        weight : float
+            new weight of the edge
+
+        """
+        if not self._has_edge(source_node, target_node):
+            raise ValueError(f"The edge {source_node}-{target_node} is not in the graph.")
+        self._update_edge_weight(source_node, target_node, weight)
+        if self._edge_curvature is not None:
+            self._update_curvature(
+                self._affected_nodes(
+                    self._node_index[source_node], self._node_index[target_node]
+                )
+            )
+
+    def _requested_edge_ids(self, edges=None, nodes=None):
+        """
+        Integer ids of the edges needed for the curvature of edges and of
+        nodes, which is contracted from all edges incident to them
+
+        Parameters
+        ----------
+        edges : iterable
+            (source, target) node tuples
+        nodes : iterable
+            node labels
+
+        Returns
+        -------
+        sorted numpy array of integer edge ids
+
+        """
+        edge_ids = []
+        for source_node, target_node in edges or []:
+            if not self._has_edge(source_node, target_node):
+                raise ValueError(
+                    f"The edge {source_node}-{target_node} is not in the graph."
+                )
+            edge_ids.append(
+                self._get_edge_id(
+                    self._node_index[source_node], self._node_index[target_node]
+                )
+            )
+        node_ids = []
+        for node in nodes or []:
+            if node not in self._node_index:
+                raise ValueError(f"The node {node} is not in the graph.")
+            node_ids.append(self._node_index[node])
+        return np.union1d(
+            np.array(edge_ids, dtype=np.int64), self._incident_edges(node_ids)
+        )
+
+    def _scatter_edge_curvature(self, edge_ids, curvature):
+        """
+        Edge curvature array with curvature at edge_ids and NaN for the edges
+        that were not calculated
+
+        """
+        if edge_ids is None:
+            return curvature
+        edge_curvature = np.full(len(self._edges), np.nan)
+        edge_curvature[edge_ids] = curvature
+        return edge_curvature
+
+    def _affected_nodes(self, source, target):
+        """
+        Nodes whose incident edges can change curvature when the edge between
+        source and target changes. Edge curvature only depends on the edges
+        incident to its endpoints, so these are the endpoints of the edge.
+
+        Returns
+        -------
+        numpy array of integer node ids
+
+        """
+        return np.unique([source, target])
+
+    def _update_curvature(self, nodes):
+        """
+        Recalculate the curvature of every edge incident to nodes, then the
+        curvature of every node incident to those edges, and update the graph
+        curvature by the change in node curvature instead of summing again
+
+        Parameters
+        ----------
+        nodes : array
+            integer node ids
+
+        """
+        edge_ids = self._incident_edges(nodes)
+        ricci_tensor = self._calculate_edges(
+            self._edge_labels(edge_ids), **self._curvature_kwargs
+        )
+        self._edge_curvature[edge_ids] = list(ricci_tensor.values())
+        if self._copy:
+            for (source, target), curvature in ricci_tensor.items():
+                self.G[source][target]["ricci_curvature"] = curvature
+
+        nodes = np.union1d(nodes, self._edges[edge_ids].ravel())
+        old_node_curvature = self._node_curvature[nodes].sum()
+        for node in nodes.tolist():
+            node_curvature = self._calculate_node_curvature(node, self._norm)
+            self._node_curvature[node] = node_curvature
+            if self._copy:
+                self.G.nodes[self._nodes[node]]["ricci_curvature"] = node_curvature
+
+        graph_curvature = float(
+            self._graph_curvature[0]
+            + (self._node_curvature[nodes].sum() - old_node_curvature)
+        )
+        self._graph_curvature = (graph_curvature, graph_curvature / len(self._nodes))
+        if self._copy:
+            (
+                self.G.graph["graph_ricci_curvature"],
+                self.G.graph["norm_graph_ricci_curvature"],
+            ) = self._graph_curvature
+
+    def _calculate_edges(self, edges, n_jobs=1, **edge_kwargs):
+        """
+        Calculate curvature of a list of edges, either serially or in chunks
+        spread over a pool of worker processes
+
+        Parameters
+        ----------
+        edges : list
+            list of (source, target) node tuples
+        n_jobs : int
+            Number of worker processes. 1 runs serially in this process and -1
+            uses all available cores. Default: 1.
+        edge_kwargs : dict
+            Keyword arguments passed to calculate_edge_curvature
+
+        Returns
+        -------
+        dictionary with edges as keys and curvature as values
+
+        """
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
+        if n_jobs < 1:
+            raise ValueError("n_jobs must be a positive integer or -1")
+
+        progress = None if self._profiler is None else self._profiler.progress_callback
+        if n_jobs == 1 or len(edges) < 2:
+            if progress is None:
+                return dict(
+                    zip(edges, self._calculate_edge_chunk(edges, **edge_kwargs))
+                )
+            ricci_tensor = {}
+            interval = max(1, self._profiler.progress_interval)
+            for i in range(0, len(edges), interval):
+                chunk = edges[i : i + interval]
+                ricci_tensor.update(
+                    zip(chunk, self._calculate_edge_chunk(chunk, **edge_kwargs))
+                )
+                progress(len(ricci_tensor), len(edges))
+            return ricci_tensor
+
+        # several chunks per worker to balance uneven neighborhood sizes
+        chunk_size = max(1, -(-len(edges) // (4 * n_jobs)))
+        chunks = [edges[i : i + chunk_size] for i in range(0, len(edges), chunk_size)]
+        ricci_tensor = {}
+        with ProcessPoolExecutor(
+            max_workers=n_jobs, initializer=_init_worker, initargs=(self,)
+        ) as executor:
+            results = executor.map(
+                _calculate_edge_chunk, chunks, [edge_kwargs] * len(chunks)
+            )
+            for chunk, chunk_results in zip(chunks, results):
+                ricci_tensor.update(zip(chunk, chunk_results))
+                if progress is not None:
+                    progress(len(ricci_tensor), len(edges))
+        return ricci_tensor
+
+    def _calculate_edge_chunk(self, edges, **edge_kwargs):
+        """
+        Calculate curvature of a list of edges in this process
+
+        Returns
+        -------
+        list of curvature values in the order of edges
+
+        """
+        return [
+            self.calculate_edge_curvature(edge[0], edge[1], **edge_kwargs)
+            for edge in edges
+        ]
 
     def _calculate_graph_curvature(self):
         """
@@ -25,13 +1090,11 @@ class _RicciCurvature(_GraphMetric):
 
         """
 
-        graph_curvature = 0
-        for node in self.G.nodes.data():
-            graph_curvature += node[1]["ricci_curvature"]
-        graph_curvature_norm = graph_curvature / self.G.number_of_nodes()
+        graph_curvature = float(self._node_curvature.sum())
+        graph_curvature_norm = graph_curvature / len(self._nodes)
         return graph_curvature, graph_curvature_norm
 
-    def _calculate_node_curvature(self, node, norm=True):
+    def _calculate_node_curvature(self, node, norm=True, edge_curvature=None):
         """
         Calculates normalized, or unnormalized, nodal scalar Ricci Curvature
         (i.e. contracting the curvature tensor) as described in Sandhu et al.,
@@ -39,10 +1102,13 @@ class _RicciCurvature(_GraphMetric):
 
         Parameters
         ----------
-        node : int or tuple
-            index of node in graph self.G
+        node : int
+            integer id of node in graph self.G
         norm : bool
             if True, normalize scalar curvature by edge weights
+        edge_curvature : numpy array
+            curvature of every edge ordered by integer edge id. Default:
+            self._edge_curvature.
 
         Returns
         -------
@@ -50,17 +1116,93 @@ class _RicciCurvature(_GraphMetric):
         sums are normalized by edge weights of node
 
         """
-        neighbors = self._get_neighbors(node)
+        if edge_curvature is None:
+            edge_curvature = self._edge_curvature
+        start, end = self._indptr[node], self._indptr[node + 1]
+        edge_curvature = edge_curvature[self._slot_edges[start:end]]
         if norm:
-            weight_sum = self._calculate_weight_sum(node, neighbors)
-            return sum(
-                [
-                    self.G[node][neighbor]["ricci_curvature"]
-                    * (self.G[node][neighbor][self.edge_weight_key] / weight_sum)
-                    for neighbor in neighbors
-                ]
-            )
+            weights = self._weights[start:end]
+            return float(sum(edge_curvature * (weights / weights.sum())))
         else:
-            return sum(
-                [self.G[node][neighbor]["ricci_curvature"] for neighbor in neighbors]
-            )
+            return float(sum(edge_curvature))
+
+    def _calculate_node_curvatures(self, norm=True):
+        """
+        Contract the curvature tensor at every node at once with sparse matrix
+        vector products over the compact graph. Equivalent to calling
+        _calculate_node_curvature for each node.
+
+        Parameters
+        ----------
+        norm : bool
+            if True, normalize scalar curvature by edge weights
+
+        Returns
+        -------
+        numpy array of nodal scalar curvature ordered by integer node id
+
+        """
+        shape = (len(self._nodes), len(self._nodes))
+        slot_curvature = self._edge_curvature[self._slot_edges]
+        if not norm:
+            return sp.csr_array(
+                (slot_curvature, self._indices, self._indptr), shape=shape
+            ) @ np.ones(shape[0])
+
+        weighted_curvature = sp.csr_array(
+            (slot_curvature * self._weights, self._indices, self._indptr), shape=shape
+        ) @ np.ones(shape[0])
+        weight_sums = sp.csr_array(
+            (self._weights, self._indices, self._indptr), shape=shape
+        ) @ np.ones(shape[0])
+        # isolated nodes have no curvature to contract
+        return np.divide(
+            weighted_curvature,
+            weight_sums,
+            out=np.zeros(shape[0]),
+            where=weight_sums != 0,
+        )
+
+    def _set_curvature_attributes(self, edge_curvature, norm):
+        """
+        Store edge curvature values, calculate the node and graph contractions
+        and, unless self.G was not copied, set all of them as attributes of
+        self.G. Edges with NaN curvature were not calculated; nodes incident to
+        them and the graph get NaN curvature and no attributes.
+
+        Parameters
+        ----------
+        edge_curvature : numpy array
+            curvature of every edge of self.G ordered by integer edge id
+        norm : bool
+            If True, normalize nodal scalar curvature.
+
+        """
+        self._norm = norm
+        self._edge_curvature = np.asarray(edge_curvature, dtype=np.float64)
+        self._node_curvature = self._calculate_node_curvatures(norm)
+        self._graph_curvature = self._calculate_graph_curvature()
+        if not self._copy:
+            return
+
+        for (source, target), curvature in zip(
+            self._edges.tolist(), self._edge_curvature.tolist()
+        ):
+            edge_data = self.G[self._nodes[source]][self._nodes[target]]
+            if math.isnan(curvature):
+                edge_data.pop("ricci_curvature", None)
+            else:
+                edge_data["ricci_curvature"] = curvature
+        for node, curvature in zip(self._nodes, self._node_curvature.tolist()):
+            if math.isnan(curvature):
+                self.G.nodes[node].pop("ricci_curvature", None)
+            else:
+                self.G.nodes[node]["ricci_curvature"] = curvature
+        if math.isnan(self._graph_curvature[0]):
+            self.G.graph.pop("graph_ricci_curvature", None)
+            self.G.graph.pop("norm_graph_ricci_curvature", None)
+        else:
+            (
+                self.G.graph["graph_ricci_curvature"],
+                self.G.graph["norm_graph_ricci_curvature"],
+            ) = self._graph_curvature
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class CurvatureSeries:
+    """
+    Curvature of a series of snapshots of a graph, as calculated by
+    curvature_series of OllivierRicciCurvature or FormanRicciCurvature. Rows
+    are snapshots and columns are every node or edge that appears in any
+    snapshot, in order of first appearance. Nodes and edges missing from a
+    snapshot have NaN curvature in its row.
+
+    Attributes
+    ----------
+    nodes : list
+        node labels of the columns of node_curvature
+    edges : list
+        (source, target) node labels of the columns of edge_curvature
+    edge_curvature : numpy array of shape (number of snapshots, number of edges)
+    node_curvature : numpy array of shape (number of snapshots, number of nodes)
+    graph_curvature : numpy array of shape (number of snapshots, 2)
+        unnormalized and normalized graph curvature
+    recalculated_edges : numpy array of shape (number of snapshots,)
+        number of edges whose curvature was calculated for each snapshot
+
+    """
+
+    def __init__(
+        self, nodes, edges, edge_curvature, node_curvature, graph_curvature, recalculated_edges
+    ):
+        self.nodes = nodes
+        self.edges = edges
+        self.edge_curvature = edge_curvature
+        self.node_curvature = node_curvature
+        self.graph_curvature = graph_curvature
+        self.recalculated_edges = recalculated_edges
+
+    def __len__(self):
+        return len(self.graph_curvature)
+
+    @classmethod
+    def _from_rows(cls, nodes, edges, rows, recalculated_edges):
+        """
+        Pack per snapshot (node columns, node curvature, edge columns, edge
+        curvature, graph curvature) rows into padded arrays
+
+        """
+        edge_curvature = np.full((len(rows), len(edges)), np.nan)
+        node_curvature = np.full((len(rows), len(nodes)), np.nan)
+        graph_curvature = np.empty((len(rows), 2))
+        for t, (node_columns, nodes_t, edge_columns, edges_t, graph_t) in enumerate(rows):
+            node_curvature[t, node_columns] = nodes_t
+            edge_curvature[t, edge_columns] = edges_t
+            graph_curvature[t] = graph_t
+        return cls(
+            nodes,
+            edges,
+            edge_curvature,
+            node_curvature,
+            graph_curvature,
+            np.array(recalculated_edges, dtype=np.int64),
+        )
@@ -0,0 +1,132 @@
+import json
+import os
+import networkx as nx
+import numpy as np
+
+
+class CurvatureStore:
+    """
+    Curvature results stored as .npy files in a directory, opened as memory
+    mapped arrays so they can be shared between processes without copying.
+    Nodes are referred to by their position in G.nodes() of the graph the
+    curvature was calculated for, and edges by their position in the stored
+    edge index.
+
+    Files
+    -----
+    edge_index.npy : int32 array of shape (number of edges, 2)
+        node positions of the endpoints of every edge
+    edge_curvature.npy : float64 array of shape (number of edges,)
+    node_curvature.npy : float64 array of shape (number of nodes,)
+    graph_curvature.npy : float64 array of shape (2,)
+        unnormalized and normalized graph curvature
+    metadata.json
+        calculator class, calculation arguments and array sizes
+
+    Parameters
+    ----------
+    path : str
+        Directory containing the stored arrays
+    mmap_mode : str
+        Memory map mode passed to numpy.load. Default: r (read only).
+
+    """
+
+    def __init__(self, path, mmap_mode="r"):
+        self.path = path
+        with open(os.path.join(path, "metadata.json")) as f:
+            self.metadata = json.load(f)
+        self.edge_index = np.load(os.path.join(path, "edge_index.npy"), mmap_mode=mmap_mode)
+        self.edge_curvature = np.load(
+            os.path.join(path, "edge_curvature.npy"), mmap_mode=mmap_mode
+        )
+        self.node_curvature = np.load(
+            os.path.join(path, "node_curvature.npy"), mmap_mode=mmap_mode
+        )
+        self.graph_curvature = np.load(
+            os.path.join(path, "graph_curvature.npy"), mmap_mode=mmap_mode
+        )
+
+    @classmethod
+    def write(cls, calculator, path):
+        """
+        Write the curvature of a calculator to memory mapped .npy files
+
+        Parameters
+        ----------
+        calculator : OllivierRicciCurvature or FormanRicciCurvature
+            object on which curvature has been calculated
+        path : str
+            Directory to write to. Created if it does not exist.
+
+        Returns
+        -------
+        CurvatureStore opened on path
+
+        """
+        calculator._check_calculated()
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            "edge_index": calculator._edges,
+            "edge_curvature": calculator._edge_curvature,
+            "node_curvature": calculator._node_curvature,
+            "graph_curvature": np.array(calculator._graph_curvature),
+        }
+        for name, array in arrays.items():
+            stored = np.lib.format.open_memmap(
+                os.path.join(path, name + ".npy"),
+                mode="w+",
+                dtype=array.dtype,
+                shape=array.shape,
+            )
+            stored[:] = array
+            stored.flush()
+            del stored
+
+        metadata = {
+            "calculator": type(calculator).__name__,
+            "parameters": dict(calculator._curvature_kwargs, norm=calculator._norm),
+            "number_of_nodes": len(calculator._nodes),
+            "number_of_edges": len(calculator._edges),
+        }
+        with open(os.path.join(path, "metadata.json"), "w") as f:
+            json.dump(metadata, f, indent=2)
+        return cls(path)
+
+    def attach(self, G: nx.Graph):
+        """
+        Set the stored curvature as ricci_curvature edge, node and graph
+        attributes of G, which must have the same nodes in the same order as
+        the graph the curvature was calculated for
+
+        Parameters
+        ----------
+        G : networkx graph
+            Graph to set attributes on. Modified in place.
+
+        Returns
+        -------
+        G : networkx graph
+
+        """
+        nodes = list(G.nodes())
+        if len(nodes) != self.metadata["number_of_nodes"]:
+            raise ValueError(
+                "Graph has a different number of nodes than the stored curvature."
+            )
+
+        for (source, target), curvature in zip(
+            self.edge_index.tolist(), self.edge_curvature.tolist()
+        ):
+            if not G.has_edge(nodes[source], nodes[target]):
+                raise ValueError(
+                    f"The edge {nodes[source]}-{nodes[target]} of the stored curvature is not in the graph."
+                )
+            G[nodes[source]][nodes[target]]["ricci_curvature"] = curvature
+        nx.set_node_attributes(
+            G, dict(zip(nodes, self.node_curvature.tolist())), "ricci_curvature"
+        )
+        G.graph["graph_ricci_curvature"], G.graph["norm_graph_ricci_curvature"] = (
+            self.graph_curvature.tolist()
+        )
+        return G
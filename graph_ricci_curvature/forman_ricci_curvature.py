@@ -5,8 +5,7 @@ References:
 
 import networkx as nx
 import numpy as np
-import ot
-import math
+import scipy.sparse as sp
 from graph_ricci_curvature._ricci_curvature import _RicciCurvature
 
 
@@ -24,20 +23,33 @@ class FormanRicciCurvature(_RicciCurvature):
         Key to specify edge weights in networkx graph. Default = weight.
     node_weight_key : str
         Key to specify node weights in networkx graph. Default = weight.
+    copy : bool
+        If True (default), calculations run on a copy of G and results are set
+        as its attributes. If False, G is neither copied nor modified, missing
+        weights are treated as 1.0 and results are read from edge_curvature,
+        node_curvature and graph_curvature.
     """
 
-    def __init__(self, G: nx.Graph, edge_weight_key="weight", node_weight_key="weight"):
-        super().__init__(G, edge_weight_key, node_weight_key)
+    def __init__(
+        self, G: nx.Graph, edge_weight_key="weight", node_weight_key="weight", copy=True
+    ):
+        super().__init__(G, edge_weight_key, node_weight_key, copy)
 
-    def calculate_ricci_curvature(self, norm=True):
+    def calculate_ricci_curvature(self, norm=True, edges=None, nodes=None):
         """
         Calculate nonzero values of Ricci curvature tensor for all edges in
-        graph self.G
+        graph self.G. If edges or nodes are given, only those edges and the
+        edges incident to those nodes are calculated; every other edge and
+        node, and the graph, get NaN curvature.
 
         Parameters
         ----------
         norm : bool
             If True, normalize nodal scalar curvature.
+        edges : iterable
+            (source, target) edges to calculate. Default: None.
+        nodes : iterable
+            Nodes whose scalar curvature is calculated. Default: None.
 
         Returns
         -------
@@ -46,23 +58,86 @@ class FormanRicciCurvature(_RicciCurvature):
 
         """
 
-        ricci_tensor = {
-            edge: self.calculate_edge_curvature(
-                edge[0],
-                edge[1],
+        self._curvature_kwargs = {}
+        edge_ids = None
+        if edges is not None or nodes is not None:
+            edge_ids = self._requested_edge_ids(edges, nodes)
+        self._set_curvature_attributes(
+            self._scatter_edge_curvature(
+                edge_ids, self._calculate_all_edge_curvatures(edge_ids)
+            ),
+            norm,
+        )
+
+    def _calculate_edge_chunk(self, edges, **edge_kwargs):
+        """
+        Calculate curvature of a list of edges with the vectorized formula
+
+        Returns
+        -------
+        list of curvature values in the order of edges
+
+        """
+        nodes = np.array(
+            [[self._node_index[source], self._node_index[target]] for source, target in edges],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        edge_ids = self._slot_edges[self._get_edge_slots(nodes[:, 0], nodes[:, 1])]
+        return self._calculate_all_edge_curvatures(edge_ids.astype(np.int64)).tolist()
+
+    def _calculate_all_edge_curvatures(self, edge_ids=None):
+        """
+        Vectorized evaluation of calculate_edge_curvature for every edge in the
+        graph. The sums over edges incident to the source and target nodes are
+        the same for every edge at a node, so they are computed once per node as
+        a sparse matrix vector product over the elementwise inverse square root
+        of the weighted adjacency matrix, and the edge itself is subtracted
+        from them afterwards. For a subset of edges only the rows of their
+        endpoints are summed.
+
+        Parameters
+        ----------
+        edge_ids : array
+            integer ids of the edges to calculate. Default: all edges.
+
+        Returns
+        -------
+        numpy array of edge curvature ordered by integer edge id
+
+        """
+        if edge_ids is None:
+            num_nodes = len(self._nodes)
+            inv_sqrt_adjacency = sp.csr_array(
+                (1 / np.sqrt(self._weights), self._indices, self._indptr),
+                shape=(num_nodes, num_nodes),
+            )
+            edges = self._edges
+            edge_slots = self._edge_slots()
+            endpoint_rows = edges
+            inv_sqrt_sums = inv_sqrt_adjacency @ np.ones(num_nodes)
+        else:
+            edges = self._edges[edge_ids]
+            edge_slots = self._get_edge_slots(edges[:, 0], edges[:, 1])
+            endpoints, endpoint_rows = np.unique(edges, return_inverse=True)
+            endpoint_rows = endpoint_rows.reshape(edges.shape)
+            slots, counts = self._row_slots(endpoints)
+            inv_sqrt_sums = np.bincount(
+                np.repeat(np.arange(len(endpoints)), counts),
+                1 / np.sqrt(self._weights[slots]),
+                minlength=len(endpoints),
             )
-            for edge in self.G.edges()
-        }
-        nx.set_edge_attributes(self.G, ricci_tensor, "ricci_curvature")
-
-        node_curvature = {
-            node: self._calculate_node_curvature(node, norm) for node in self.G.nodes()
-        }
-        nx.set_node_attributes(self.G, node_curvature, "ricci_curvature")
-        (
-            self.G.graph["graph_ricci_curvature"],
-            self.G.graph["norm_graph_ricci_curvature"],
-        ) = self._calculate_graph_curvature()
+
+        edge_weights = self._weights[edge_slots]
+        source, target = edges[:, 0], edges[:, 1]
+        source_node_w = self._node_weights[source]
+        target_node_w = self._node_weights[target]
+        inv_sqrt_edge_weights = 1 / np.sqrt(edge_weights)
+
+        # equation for curvature (see Ref [1]) with sums over neighbors factored out
+        return source_node_w + target_node_w - np.sqrt(edge_weights) * (
+            source_node_w * (inv_sqrt_sums[endpoint_rows[:, 0]] - inv_sqrt_edge_weights)
+            + target_node_w * (inv_sqrt_sums[endpoint_rows[:, 1]] - inv_sqrt_edge_weights)
+        )
 
     def calculate_edge_curvature(self, source_node, target_node):
         """
@@ -78,43 +153,23 @@ class FormanRicciCurvature(_RicciCurvature):
 
         """
         # define some variables to make equation more readable
-        source_neighbors = self._get_neighbors(source_node)
-        target_neighbors = self._get_neighbors(target_node)
-        edge_weight = self.G[source_node][target_node][self.edge_weight_key]
-        source_node_w = self.G.nodes[source_node][self.node_weight_key]
-        target_node_w = self.G.nodes[target_node][self.node_weight_key]
+        source = self._node_index[source_node]
+        target = self._node_index[target_node]
+        source_neighbors = self._get_neighbors(source)
+        target_neighbors = self._get_neighbors(target)
+        source_weights = self._get_neighbor_weights(source)[source_neighbors != target]
+        target_weights = self._get_neighbor_weights(target)[target_neighbors != source]
+        edge_weight = self._get_edge_weight(source, target)
+        source_node_w = self._node_weights[source]
+        target_node_w = self._node_weights[target]
 
         # equation for curvature (see Ref [1])
         curvature = edge_weight * (
             (source_node_w / edge_weight)
             + (target_node_w / edge_weight)
             - (
-                sum(
-                    [
-                        (
-                            source_node_w
-                            / math.sqrt(
-                                edge_weight
-                                * self.G[source_node][sn_neigh][self.edge_weight_key]
-                            )
-                        )
-                        for sn_neigh in source_neighbors
-                        if sn_neigh != target_node
-                    ]
-                )
-                + sum(
-                    [
-                        (
-                            target_node_w
-                            / math.sqrt(
-                                edge_weight
-                                * self.G[target_node][tn_neigh][self.edge_weight_key]
-                            )
-                        )
-                        for tn_neigh in target_neighbors
-                        if tn_neigh != source_node
-                    ]
-                )
+                sum(source_node_w / np.sqrt(edge_weight * source_weights))
+                + sum(target_node_w / np.sqrt(edge_weight * target_weights))
             )
         )
-        return curvature
+        return float(curvature)
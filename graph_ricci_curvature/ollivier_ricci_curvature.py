@@ -4,12 +4,13 @@ References:
     - [2] Sandhu et al. 2015. "Graph Curvature for Differentiating Cancer Networks". Scientific Reports. DOi: 10.1038/srep12323. DOI: https://doi.org/10.1038/srep12323.
 """
 
+import itertools
 import networkx as nx
 import numpy as np
 import ot
-import math
-import warnings
-from graph_ricci_curvature._ricci_curvature import _RicciCurvature
+from collections import OrderedDict
+from graph_ricci_curvature._optimal_transport import batched_sinkhorn2
+from graph_ricci_curvature._ricci_curvature import _EdgeCurvatureView, _RicciCurvature
 
 
 class OllivierRicciCurvature(_RicciCurvature):
@@ -26,11 +27,77 @@ class OllivierRicciCurvature(_RicciCurvature):
         Key to specify edge weights in networkx graph. Default = weight.
     node_weight_key : str
         Key to specify node weights in networkx graph. Default = weight.
+    copy : bool
+        If True (default), calculations run on a copy of G and results are set
+        as its attributes. If False, G is neither copied nor modified, missing
+        weights are treated as 1.0 and results are read from edge_curvature,
+        node_curvature and graph_curvature.
+    mass_cache_size : int
+        Maximum number of node mass distributions kept between the edges of a
+        calculation. The least recently used are evicted first. Default: 65536.
+    ot_cache_size : int
+        Maximum number of optimal transport costs kept by calculate_edge_curvature
+        for reuse by edges with the same transport problem up to a permutation
+        of their neighborhoods, as on lattices and regular graphs. The least
+        recently used are evicted first. 0 disables the cache. Default: 0.
 
     """
 
-    def __init__(self, G: nx.Graph, edge_weight_key="weight", node_weight_key="weight"):
-        super().__init__(G, edge_weight_key, node_weight_key)
+    def __init__(
+        self,
+        G: nx.Graph,
+        edge_weight_key="weight",
+        node_weight_key="weight",
+        copy=True,
+        mass_cache_size=65536,
+        ot_cache_size=0,
+    ):
+        super().__init__(G, edge_weight_key, node_weight_key, copy)
+        self.mass_cache_size = mass_cache_size
+        # node id -> (neighbors, distribution) for the alpha and dist_type of
+        # _mass_cache_key
+        self._mass_cache = OrderedDict()
+        self._mass_cache_key = None
+        self.ot_cache_size = ot_cache_size
+        # transport problem signature -> optimal transport cost
+        self._ot_cache = OrderedDict()
+        self._ot_cache_hits = 0
+        self._ot_cache_misses = 0
+        # (lower, upper) curvature of every edge from the last approximate
+        # calculation
+        self._curvature_bounds = None
+
+    @property
+    def ot_cache_stats(self):
+        """
+        Dictionary with the number of hits, misses and entries of the optimal
+        transport cache. Counts only calculations in this process.
+
+        """
+        return {
+            "hits": self._ot_cache_hits,
+            "misses": self._ot_cache_misses,
+            "size": len(self._ot_cache),
+        }
+
+    @property
+    def edge_curvature_bounds(self):
+        """
+        Mapping from (source, target) edges to (lower, upper) bounds of their
+        curvature from the last calculate_approximate_ricci_curvature call
+
+        """
+        if self._curvature_bounds is None:
+            raise ValueError(
+                "Curvature bounds have not been calculated. Call calculate_approximate_ricci_curvature first."
+            )
+        return _EdgeCurvatureView(self, "_curvature_bounds")
+
+    def __getstate__(self):
+        # worker processes build their own cache
+        state = super().__getstate__()
+        state["_mass_cache"] = OrderedDict()
+        return state
 
     def calculate_ricci_curvature(
         self,
@@ -41,10 +108,19 @@ class OllivierRicciCurvature(_RicciCurvature):
         weight_path_matrix=False,
         numThreads=1,
         reg=0.1,
+        n_jobs=1,
+        batch_size=256,
+        exact_shortcut=True,
+        edges=None,
+        nodes=None,
+        checkpoint=None,
+        checkpoint_interval=1000,
     ):
         """
         Calculate nonzero values of Ricci curvature tensor for all edges in
-        graph self.G and tensor contractions.
+        graph self.G and tensor contractions. If edges or nodes are given,
+        only those edges and the edges incident to those nodes are calculated;
+        every other edge and node, and the graph, get NaN curvature.
 
         Parameters
         ----------
@@ -56,13 +132,35 @@ class OllivierRicciCurvature(_RicciCurvature):
         dist_type : str
             Distribution type for mass distribution in source or target node neighborhood. Default: uniform. Options: uniform, linear, inverse-linear, gaussian.
         method : str
-            Method for calculating optimal transport plan. Options: otd (optimal transport distance), sinkhorn.
+            Method for calculating optimal transport plan. Options: otd (optimal transport distance), sinkhorn, sinkhorn-batch (sinkhorn iterations run on batches of edges at once).
         weight_path_matrix : bool
             When True, use edge weights when calculating shortest distance matrix. Default: False.
         numThreads : int
             Specify number of threads for optimal transport plan. Only for "otd" method.
         reg : float
-            Regularization term to be used with "sinkhorn" method.
+            Regularization term to be used with "sinkhorn" and "sinkhorn-batch" methods.
+        n_jobs : int
+            Number of worker processes the edges are split between. -1 uses all
+            available cores. Default: 1.
+        batch_size : int
+            Maximum number of edges solved together by the "sinkhorn-batch"
+            method. Bounds the memory used by the batched arrays. Default: 256.
+        exact_shortcut : bool
+            If True, edges whose curvature has a closed form (see
+            calculate_edge_curvature) are calculated without solving the
+            optimal transport problem. Default: True.
+        edges : iterable
+            (source, target) edges to calculate. Default: None.
+        nodes : iterable
+            Nodes whose scalar curvature is calculated. Default: None.
+        checkpoint : str
+            Path of a .npz file the curvature of finished edges is written to
+            while calculating. If the file exists, edges it contains are not
+            calculated again. A checkpoint written for a different graph or
+            different arguments raises a ValueError. Default: None.
+        checkpoint_interval : int
+            Number of edges calculated between writes of the checkpoint.
+            Default: 1000.
 
         Returns
         -------
@@ -74,34 +172,339 @@ class OllivierRicciCurvature(_RicciCurvature):
         if alpha >= 1 or alpha <= 0:
             raise ValueError("alpha must be set between 0 and 1")
 
-        if method != "otd" and method != "sinkhorn":
+        if method not in ("otd", "sinkhorn", "sinkhorn-batch"):
             raise NotImplementedError(
-                "Specified optimal transport method not available. Options: otd, sinkhorn."
+                "Specified optimal transport method not available. Options: otd, sinkhorn, sinkhorn-batch."
             )
 
-        ricci_tensor = {
-            edge: self.calculate_edge_curvature(
-                edge[0],
-                edge[1],
-                alpha=alpha,
-                dist_type=dist_type,
-                method=method,
-                weight_path_matrix=weight_path_matrix,
-                numThreads=numThreads,
-                reg=reg,
+        self._mass_cache.clear()
+        self._set_bound_attributes(None)
+        self._curvature_kwargs = {
+            "alpha": alpha,
+            "dist_type": dist_type,
+            "method": method,
+            "weight_path_matrix": weight_path_matrix,
+            "numThreads": numThreads,
+            "reg": reg,
+            "batch_size": batch_size,
+            "exact_shortcut": exact_shortcut,
+        }
+        edge_ids = None
+        if edges is not None or nodes is not None:
+            edge_ids = self._requested_edge_ids(edges, nodes)
+        if checkpoint is not None:
+            edge_curvature = self._calculate_edges_checkpointed(
+                np.arange(len(self._edges)) if edge_ids is None else edge_ids,
+                checkpoint,
+                checkpoint_interval,
+                n_jobs,
+                self._curvature_kwargs,
+            )
+        else:
+            ricci_tensor = self._calculate_edges(
+                self._edge_labels(edge_ids), n_jobs=n_jobs, **self._curvature_kwargs
             )
-            for edge in self.G.edges()
+            edge_curvature = self._scatter_edge_curvature(
+                edge_ids, list(ricci_tensor.values())
+            )
+        self._set_curvature_attributes(edge_curvature, norm)
+
+    def calculate_approximate_ricci_curvature(
+        self,
+        alpha=0.5,
+        norm=True,
+        dist_type="uniform",
+        tol=0.1,
+        threshold=0.0,
+        numThreads=1,
+        n_jobs=1,
+    ):
+        """
+        Calculate lower and upper bounds of the curvature of every edge from
+        the neighborhoods of its endpoints, without solving optimal transport
+        problems, and calculate the exact curvature (with the "otd" method) only
+        of edges whose bounds are further apart than tol or contain threshold.
+        The curvature of the other edges is the midpoint of their bounds, and
+        node and graph curvature are contracted from these values.
+
+        The bounds use the hop distances from the support of both mass
+        distributions to the endpoints, which are known from the common
+        neighbors of the endpoints. The lower bound of the Wasserstein distance
+        is the Kantorovich dual of the 1-Lipschitz functions d(., target) and
+        -d(., source). The upper bound is the cost of the transport plan that
+        leaves mass shared by both distributions in place and routes the rest
+        through the target or through the source, whichever is cheaper.
+
+        Parameters
+        ----------
+        alpha : float
+            Hyperparameter (0 <= alpha <=1) determining how much mass to move
+            from node.
+        norm : bool
+            If True, normalize nodal scalar curvature.
+        dist_type : str
+            Distribution type for mass distribution in source or target node neighborhood. Default: uniform. Options: uniform, linear, inverse-linear, gaussian.
+        tol : float
+            Largest difference between the bounds of an edge that is not
+            calculated exactly. Default: 0.1.
+        threshold : float
+            Edges whose bounds contain threshold are calculated exactly, so
+            every edge is known to be above or below it. Default: 0.0.
+        numThreads : int
+            Specify number of threads for optimal transport plan.
+        n_jobs : int
+            Number of worker processes exactly calculated edges are split
+            between. -1 uses all available cores. Default: 1.
+
+        Returns
+        -------
+        self.G : networkx graph
+            Returns graph with ricci_curvature as graph, node, and edge
+            attributes, and ricci_curvature_lower and ricci_curvature_upper as
+            edge attributes
+
+        """
+        if alpha >= 1 or alpha <= 0:
+            raise ValueError("alpha must be set between 0 and 1")
+
+        self._mass_cache.clear()
+        self._curvature_kwargs = {
+            "alpha": alpha,
+            "dist_type": dist_type,
+            "method": "otd",
+            "weight_path_matrix": False,
+            "numThreads": numThreads,
+            "reg": 0.1,
+            "batch_size": 256,
+            "exact_shortcut": True,
         }
-        nx.set_edge_attributes(self.G, ricci_tensor, "ricci_curvature")
+        bounds = np.array(
+            [
+                self._edge_curvature_bounds(source, target, alpha, dist_type)
+                for source, target in self._edges.tolist()
+            ]
+        ).reshape(-1, 2)
+        refine = np.flatnonzero(
+            (bounds[:, 1] - bounds[:, 0] > tol)
+            | ((bounds[:, 0] < threshold) & (bounds[:, 1] > threshold))
+        )
+        ricci_tensor = self._calculate_edges(
+            self._edge_labels(refine), n_jobs=n_jobs, **self._curvature_kwargs
+        )
+        bounds[refine] = np.array(list(ricci_tensor.values()))[:, None]
+
+        self._set_curvature_attributes(bounds.mean(axis=1), norm)
+        self._set_bound_attributes(bounds)
+
+    def _set_bound_attributes(self, bounds):
+        """
+        Store curvature bounds of every edge and, unless self.G was not copied,
+        set them as ricci_curvature_lower and ricci_curvature_upper edge
+        attributes. With bounds None, remove bounds of an earlier approximate
+        calculation.
+
+        """
+        previous, self._curvature_bounds = self._curvature_bounds, bounds
+        if not self._copy or (bounds is None and previous is None):
+            return
+        for (source, target), edge_bounds in zip(
+            self._edge_labels(), [None] * len(self._edges) if bounds is None else bounds.tolist()
+        ):
+            edge_data = self.G[source][target]
+            if edge_bounds is None:
+                edge_data.pop("ricci_curvature_lower", None)
+                edge_data.pop("ricci_curvature_upper", None)
+            else:
+                edge_data["ricci_curvature_lower"], edge_data["ricci_curvature_upper"] = edge_bounds
+
+    def _edge_curvature_bounds(self, source, target, alpha, dist_type):
+        """
+        Lower and upper bounds of the curvature of the edge between source and
+        target with the hop distance, as described in
+        calculate_approximate_ricci_curvature
+
+        Returns
+        -------
+        (lower, upper) tuple of floats
 
-        node_curvature = {
-            node: self._calculate_node_curvature(node, norm) for node in self.G.nodes()
+        """
+        source_nodes, source_dist = self._cached_mass_distribution(
+            source, alpha, dist_type
+        )
+        target_nodes, target_dist = self._cached_mass_distribution(
+            target, alpha, dist_type
+        )
+        # both distributions on the union of their supports
+        nodes = np.union1d(source_nodes, target_nodes)
+        source_mass = np.zeros(len(nodes))
+        target_mass = np.zeros(len(nodes))
+        source_mass[np.searchsorted(nodes, source_nodes)] = source_dist
+        target_mass[np.searchsorted(nodes, target_nodes)] = target_dist
+
+        # every node is a neighbor of source or target, so at most 2 hops from both
+        to_source = np.where(np.isin(nodes, self._get_neighbors(source)), 1.0, 2.0)
+        to_source[nodes == source] = 0
+        to_target = np.where(np.isin(nodes, self._get_neighbors(target)), 1.0, 2.0)
+        to_target[nodes == target] = 0
+
+        difference = source_mass - target_mass
+        lower = max(difference @ to_target, -difference @ to_source, 0.0)
+        unmatched = np.abs(difference)
+        upper = min(unmatched @ to_target, unmatched @ to_source)
+        # the bounds can cross by rounding when they are equal
+        lower = min(lower, upper)
+
+        edge_weight = self._get_edge_weight(source, target)
+        return 1 - upper / edge_weight, 1 - lower / edge_weight
+
+    def sweep(
+        self,
+        alphas=(0.5,),
+        dist_types=("uniform",),
+        methods=("otd",),
+        weight_path_matrix=False,
+        numThreads=1,
+        reg=0.1,
+        exact_shortcut=True,
+        n_jobs=1,
+        chunk_size=1024,
+    ):
+        """
+        Calculate edge curvature for every combination of alpha, dist_type and
+        method in one pass over the edges. The neighborhoods and shortest path
+        matrix of each edge are the same for every combination, so they are
+        built once per edge and every combination is solved against them.
+        Curvature attributes of self.G are not changed.
+
+        Parameters
+        ----------
+        alphas : iterable
+            Values of alpha (0 < alpha < 1). Default: (0.5,).
+        dist_types : iterable
+            Distribution types. Default: ("uniform",).
+        methods : iterable
+            Optimal transport methods. Default: ("otd",).
+        weight_path_matrix : bool
+            When True, use edge weights when calculating shortest distance
+            matrix. Default: False.
+        numThreads : int
+            Number of threads for the "otd" method.
+        reg : float
+            Regularization term of the "sinkhorn" and "sinkhorn-batch" methods.
+        exact_shortcut : bool
+            If True, use the closed form of calculate_edge_curvature where it
+            applies. Default: True.
+        n_jobs : int
+            Number of worker processes. -1 uses all available cores. Default: 1.
+        chunk_size : int
+            Number of edges calculated together. Default: 1024.
+
+        Returns
+        -------
+        edges : list
+            (source, target) node labels of the rows of curvature, in the
+            internal edge order of the calculator. This is the order of
+            self.G.edges() until edges are added or removed.
+        curvature : numpy array of shape (number of edges, number of combinations)
+            columns ordered as itertools.product(alphas, dist_types, methods)
+
+        """
+        parameters = list(itertools.product(alphas, dist_types, methods))
+        for alpha, dist_type, method in parameters:
+            if alpha >= 1 or alpha <= 0:
+                raise ValueError("alpha must be set between 0 and 1")
+            if method not in ("otd", "sinkhorn", "sinkhorn-batch"):
+                raise NotImplementedError(
+                    "Specified optimal transport method not available. Options: otd, sinkhorn, sinkhorn-batch."
+                )
+
+        edge_kwargs = {
+            "sweep": parameters,
+            "weight_path_matrix": weight_path_matrix,
+            "numThreads": numThreads,
+            "reg": reg,
+            "exact_shortcut": exact_shortcut,
         }
-        nx.set_node_attributes(self.G, node_curvature, "ricci_curvature")
-        (
-            self.G.graph["graph_ricci_curvature"],
-            self.G.graph["norm_graph_ricci_curvature"],
-        ) = self._calculate_graph_curvature()
+        curvature = np.empty((len(self._edges), len(parameters)))
+        for edge_ids, results in self._iter_edge_chunks(
+            np.arange(len(self._edges)), chunk_size, n_jobs, False, edge_kwargs
+        ):
+            curvature[edge_ids] = results
+        return self._edge_labels(), curvature
+
+    def ricci_flow(self, iterations=20, step=1.0, tol=1e-4, normalize=True, n_jobs=1, **kwargs):
+        """
+        Evolve edge weights by discrete Ricci flow, w <- w - step * curvature * w,
+        with curvature recalculated from the updated weights after each step.
+        The compact graph and neighborhood index are kept between iterations
+        and only the weights change. Only edges incident to a node with an
+        edge whose weight changed by more than tol (relative) are
+        recalculated; with weight_path_matrix the neighbors of those nodes are
+        included as well. The sinkhorn methods start each edge from its
+        transport scaling vectors of the previous iteration (when n_jobs is 1).
+        The "otd" solver in POT has no warm start and is solved from scratch.
+
+        Parameters
+        ----------
+        iterations : int
+            Maximum number of flow steps. Default: 20.
+        step : float
+            Step size of the flow. Default: 1.0.
+        tol : float
+            Relative weight change below which an edge is considered unchanged.
+            The flow stops once no edge changes by more than tol. Default: 1e-4.
+        normalize : bool
+            If True, rescale weights after each step so their sum is kept
+            constant. Default: True.
+        n_jobs : int
+            Number of worker processes used to recalculate edges. Default: 1.
+        kwargs : dict
+            Arguments of calculate_ricci_curvature. If given, or if curvature
+            has not been calculated yet, calculate_ricci_curvature is called
+            with them first. Otherwise the arguments of the last call are used.
+
+        The flowed weights are set as edge weights of self.G and the curvature
+        of the final weights as graph, node, and edge attributes (for an
+        uncopied graph they are only kept in the internal arrays).
+
+        """
+        if kwargs or self._edge_curvature is None:
+            self.calculate_ricci_curvature(n_jobs=n_jobs, **kwargs)
+
+        edge_kwargs = dict(self._curvature_kwargs)
+        potentials = {} if edge_kwargs["method"] != "otd" else None
+        weights = self._weights[self._edge_slots()]
+        total_weight = weights.sum()
+        for iteration in range(iterations):
+            new_weights = weights - step * self._edge_curvature * weights
+            if normalize:
+                new_weights *= total_weight / new_weights.sum()
+            changed = np.abs(new_weights - weights) > tol * np.abs(weights)
+            self._weights = new_weights[self._slot_edges]
+            weights = new_weights
+            if not changed.any():
+                break
+
+            nodes = np.unique(self._edges[changed].ravel())
+            for node in nodes.tolist():
+                self._mass_cache.pop(node, None)
+            if edge_kwargs["weight_path_matrix"]:
+                nodes = np.union1d(nodes, np.unique(self._adjacency[nodes].indices))
+            edge_ids = self._incident_edges(nodes)
+            ricci_tensor = self._calculate_edges(
+                self._edge_labels(edge_ids),
+                n_jobs=n_jobs,
+                potentials=potentials if n_jobs == 1 else None,
+                **edge_kwargs,
+            )
+            self._edge_curvature[edge_ids] = list(ricci_tensor.values())
+
+        if self._copy:
+            for (source, target), weight in zip(self._edge_labels(), weights.tolist()):
+                self.G[source][target][self.edge_weight_key] = weight
+        # bounds of an approximate calculation do not hold for the flowed weights
+        self._set_bound_attributes(None)
+        self._set_curvature_attributes(self._edge_curvature, self._norm)
 
     def calculate_edge_curvature(
         self,
@@ -113,6 +516,7 @@ class OllivierRicciCurvature(_RicciCurvature):
         weight_path_matrix=False,
         numThreads=1,
         reg=0.1,
+        exact_shortcut=True,
     ):
         """
         Calculate value of Ollivier Ricci Curvature tensor associated with an edge
@@ -120,6 +524,14 @@ class OllivierRicciCurvature(_RicciCurvature):
 
         1 - ( Wasserstein 1 Distance / Edge Weight )
 
+        With the "otd" method, a uniform dist_type and an unweighted path
+        matrix, the Wasserstein distance of an edge whose endpoints have no
+        common neighbors and whose other neighbors are all 3 hops apart (no
+        triangle, 4-cycle or 5-cycle through the edge) is calculated in closed
+        form. The neighborhoods then lie on a line (source neighbors, source,
+        target, target neighbors) and the distance is the area between the
+        cumulative distributions, which is what the linear program returns.
+
         Parameters
         ----------
         source_node : int or tuple
@@ -132,13 +544,15 @@ class OllivierRicciCurvature(_RicciCurvature):
         dist_type : str
             Distribution type for mass distribution in source or target node neighborhood. Default: uniform. Options: uniform, linear, inverse-linear, gaussian.
         method : str
-            Method for calculating optimal transport plan. Options: otd (optimal transport distance), sinkhorn
+            Method for calculating optimal transport plan. Options: otd (optimal transport distance), sinkhorn, sinkhorn-batch
         weight_path_matrix : bool
             When True, use edge weights when calculating shortest distance matrix. Default: False.
         numThreads : int
             Specify number of threads for optimal transport plan. Only for "otd" method.
         reg : float
-            Regularization term to be used with "sinkhorn" method
+            Regularization term to be used with "sinkhorn" and "sinkhorn-batch" methods
+        exact_shortcut : bool
+            If True, use the closed form when it applies. Default: True.
 
         Returns
         -------
@@ -146,29 +560,452 @@ class OllivierRicciCurvature(_RicciCurvature):
             value of curvature tensor
 
         """
-        source_neighbors, source_dist = self._neighborhood_mass_distribution(
-            source_node, alpha, dist_type
-        )
-        target_neighbors, target_dist = self._neighborhood_mass_distribution(
-            target_node, alpha, dist_type
+        source = self._node_index[source_node]
+        target = self._node_index[target_node]
+        source_dist, target_dist, short_path_matrix = self._transport_problem(
+            source, target, alpha, dist_type, weight_path_matrix
         )
+        if (
+            exact_shortcut
+            and method == "otd"
+            and dist_type == "uniform"
+            and not weight_path_matrix
+        ):
+            opt_transport = self._tree_like_transport_distance(
+                source, target, alpha, short_path_matrix
+            )
+            if opt_transport is not None:
+                return float(1 - opt_transport / self._get_edge_weight(source, target))
+
+        if self.ot_cache_size > 0:
+            opt_transport = self._cached_transport(
+                source_dist, target_dist, short_path_matrix, method, numThreads, reg
+            )
+        else:
+            opt_transport = self._solve_transport(
+                source_dist, target_dist, short_path_matrix, method, numThreads, reg
+            )
+        edge_weight = self._get_edge_weight(source, target)
+        curvature = 1 - (opt_transport / edge_weight)
+        return float(curvature)
+
+    def _affected_nodes(self, source, target):
+        """
+        Nodes whose incident edges can change curvature when the edge between
+        source and target changes. The curvature of an edge depends on paths of
+        at most 3 hops between the neighborhoods of its endpoints, which can
+        only pass through the changed edge if one of the endpoints is within 2
+        hops of source or target. Weighted shortest paths are not bounded in
+        hops, so every node is affected when weight_path_matrix is used.
+
+        Returns
+        -------
+        numpy array of integer node ids
+
+        """
+        if self._curvature_kwargs.get("weight_path_matrix"):
+            return np.arange(len(self._nodes))
+        lengths = self._bfs_path_lengths(source, cutoff=2)
+        lengths.update(self._bfs_path_lengths(target, cutoff=2))
+        return np.array(sorted(lengths))
+
+    def _update_curvature(self, nodes):
+        # node ids of a rebuilt snapshot graph no longer match the cached
+        # neighborhoods, and bounds of an approximate calculation are indexed
+        # by edge ids that may shift
+        self._mass_cache.clear()
+        self._set_bound_attributes(None)
+        super()._update_curvature(nodes)
+
+    # cached neighborhoods are stale after any edit of the compact graph,
+    # whether or not curvature has been calculated yet
+    def _insert_edge(self, source_node, target_node, weight):
+        self._mass_cache.clear()
+        super()._insert_edge(source_node, target_node, weight)
+
+    def _delete_edge(self, source_node, target_node):
+        self._mass_cache.clear()
+        return super()._delete_edge(source_node, target_node)
+
+    def _update_edge_weight(self, source_node, target_node, weight):
+        self._mass_cache.clear()
+        super()._update_edge_weight(source_node, target_node, weight)
+
+    def _transport_problem(self, source, target, alpha, dist_type, weight_path_matrix):
+        """
+        Mass distributions of the neighborhoods of an edge and the shortest
+        path matrix between them
 
+        Parameters
+        ----------
+        source : int
+            integer id of source node
+        target : int
+            integer id of target node
+
+        Returns
+        -------
+        source_dist : numpy array
+            mass distribution of source neighborhood
+        target_dist : numpy array
+            mass distribution of target neighborhood
+        short_path_matrix : numpy array
+            shortest path lengths between the source and target neighborhoods
+
+        """
+        source_neighbors, source_dist = self._cached_mass_distribution(
+            source, alpha, dist_type
+        )
+        target_neighbors, target_dist = self._cached_mass_distribution(
+            target, alpha, dist_type
+        )
         short_path_matrix = self._get_shortest_path_matrix(
             source_neighbors, target_neighbors, weight_path_matrix
         )
+        return source_dist, target_dist, short_path_matrix
+
+    def _tree_like_transport_distance(self, source, target, alpha, short_path_matrix):
+        """
+        Closed form Wasserstein distance between the uniform mass distributions
+        of source and target in the hop metric, for edges whose neighborhoods
+        are locally tree-like. Whether they are is read from the hop path
+        matrix between the neighborhoods, which is built for the transport
+        problem anyway.
+
+        Parameters
+        ----------
+        source : int
+            integer id of source node
+        target : int
+            integer id of target node
+        alpha : float
+            mass kept at source and target
+        short_path_matrix : numpy array
+            hop path matrix between the neighborhoods of source and target
+            from _mass_distribution (neighbors followed by the node itself)
 
+        Returns
+        -------
+        float distance, or None if the edge has a triangle, 4-cycle or 5-cycle
+        through it
+
+        """
+        source_degree = self._indptr[source + 1] - self._indptr[source]
+        target_degree = self._indptr[target + 1] - self._indptr[target]
+        # the 2 * (source_degree + target_degree) entries in the rows or columns
+        # of source and target are always under 3 hops. A common neighbor or a
+        # 4- or 5-cycle through the edge brings another pair under 3 hops.
+        if np.count_nonzero(short_path_matrix < 3) != 2 * (source_degree + target_degree):
+            return None
+
+        # cumulative mass differences at source neighbors, source and target
+        source_spread = (1 - alpha) * (source_degree - 1) / source_degree
+        target_spread = (1 - alpha) * (target_degree - 1) / target_degree
+        return float(
+            source_spread
+            + abs(source_spread + alpha - (1 - alpha) / target_degree)
+            + target_spread
+        )
+
+    def _cached_transport(
+        self, source_dist, target_dist, short_path_matrix, method, numThreads, reg
+    ):
+        """
+        _solve_transport through the LRU cache of optimal transport costs
+
+        """
+        key = self._transport_signature(
+            source_dist, target_dist, short_path_matrix, method, reg
+        )
+        opt_transport = self._ot_cache.get(key)
+        if opt_transport is not None:
+            self._ot_cache.move_to_end(key)
+            self._ot_cache_hits += 1
+            return opt_transport
+
+        self._ot_cache_misses += 1
+        opt_transport = self._solve_transport(
+            source_dist, target_dist, short_path_matrix, method, numThreads, reg
+        )
+        self._ot_cache[key] = opt_transport
+        if len(self._ot_cache) > self.ot_cache_size:
+            self._ot_cache.popitem(last=False)
+        return opt_transport
+
+    @staticmethod
+    def _transport_signature(source_dist, target_dist, short_path_matrix, method, reg):
+        """
+        Key identifying a transport problem up to a permutation of its rows and
+        columns. Columns are sorted by target mass and their sorted costs, then
+        rows by source mass and their costs, and the permuted problem itself is
+        the key, so equal keys always have the same optimal transport cost.
+
+        """
+        columns = np.lexsort(np.vstack([np.sort(short_path_matrix, axis=0), target_dist]))
+        short_path_matrix = short_path_matrix[:, columns]
+        rows = np.lexsort(np.vstack([short_path_matrix.T, source_dist]))
+        return (
+            method,
+            reg if method != "otd" else None,
+            short_path_matrix.shape,
+            source_dist[rows].tobytes(),
+            target_dist[columns].tobytes(),
+            short_path_matrix[rows].tobytes(),
+        )
+
+    @staticmethod
+    def _reduce_shared_mass(source_dist, target_dist, short_path_matrix):
+        """
+        Cancel mass of the source and target distributions that sits on the
+        same node, and drop the rows and columns left without mass. Shortest
+        path lengths are a metric, so the Wasserstein distance only depends on
+        the difference of the distributions and is unchanged. Nodes of both
+        neighborhoods (the endpoints and their common neighbors) are found as
+        pairs of zero path length.
+
+        Returns
+        -------
+        source_dist, target_dist and short_path_matrix of the residual problem
+
+        """
+        rows, columns = np.nonzero(short_path_matrix == 0)
+        if len(rows) == 0:
+            return source_dist, target_dist, short_path_matrix
+        source_dist = source_dist.copy()
+        target_dist = target_dist.copy()
+        if np.unique(rows).size == rows.size and np.unique(columns).size == columns.size:
+            shared = np.minimum(source_dist[rows], target_dist[columns])
+            source_dist[rows] -= shared
+            target_dist[columns] -= shared
+        else:
+            # zero weight edges put distinct nodes at zero path length
+            for row, column in zip(rows.tolist(), columns.tolist()):
+                shared = min(source_dist[row], target_dist[column])
+                source_dist[row] -= shared
+                target_dist[column] -= shared
+        keep_rows = source_dist > 0
+        keep_columns = target_dist > 0
+        return (
+            source_dist[keep_rows],
+            target_dist[keep_columns],
+            short_path_matrix[np.ix_(keep_rows, keep_columns)],
+        )
+
+    def _solve_transport(
+        self, source_dist, target_dist, short_path_matrix, method, numThreads, reg
+    ):
+        """
+        Wasserstein 1 distance between two neighborhood mass distributions
+
+        Returns
+        -------
+        float cost of the optimal transport plan
+
+        """
         if method == "otd":
-            opt_transport = ot.emd2(
+            source_dist, target_dist, short_path_matrix = self._reduce_shared_mass(
+                source_dist, target_dist, short_path_matrix
+            )
+            if short_path_matrix.size == 0:
+                return 0.0
+            return ot.emd2(
                 source_dist, target_dist, short_path_matrix, numThreads=numThreads
             )
         elif method == "sinkhorn":
-            opt_transport = ot.sinkhorn2(
-                source_dist, target_dist, short_path_matrix, reg=reg
+            return ot.sinkhorn2(source_dist, target_dist, short_path_matrix, reg=reg)
+        elif method == "sinkhorn-batch":
+            return batched_sinkhorn2(
+                source_dist[None], target_dist[None], short_path_matrix[None], reg
+            )[0]
+
+    def _calculate_edge_chunk(
+        self,
+        edges,
+        method="otd",
+        batch_size=256,
+        potentials=None,
+        sweep=None,
+        **edge_kwargs,
+    ):
+        """
+        Calculate curvature of a list of edges in this process. With the
+        "sinkhorn-batch" method, edges are grouped by their neighborhood sizes
+        padded to powers of two and each group is solved batch_size edges at a
+        time.
+
+        Parameters
+        ----------
+        potentials : dict
+            Sinkhorn scaling vectors keyed by edge. When given, sinkhorn methods
+            start from the stored vectors of each edge and store their final
+            vectors in it.
+        sweep : list
+            (alpha, dist_type, method) combinations. When given, every
+            combination is calculated for each edge.
+
+        Returns
+        -------
+        list of curvature values in the order of edges, or of lists of
+        curvature values of each combination if sweep is given
+
+        """
+        if sweep is not None:
+            return [self._sweep_edge_curvature(edge, sweep, **edge_kwargs) for edge in edges]
+        if method == "sinkhorn" and potentials is not None:
+            return [
+                self._warm_sinkhorn_edge_curvature(edge, potentials, **edge_kwargs)
+                for edge in edges
+            ]
+        if method != "sinkhorn-batch":
+            return super()._calculate_edge_chunk(edges, method=method, **edge_kwargs)
+
+        curvature = np.empty(len(edges))
+        batches = {}
+        for k, edge in enumerate(edges):
+            source = self._node_index[edge[0]]
+            target = self._node_index[edge[1]]
+            problem = self._transport_problem(
+                source,
+                target,
+                edge_kwargs["alpha"],
+                edge_kwargs["dist_type"],
+                edge_kwargs["weight_path_matrix"],
             )
+            shape = tuple(1 << (size - 1).bit_length() for size in problem[2].shape)
+            batch = batches.setdefault(shape, [])
+            batch.append((k, edge, self._get_edge_weight(source, target)) + problem)
+            if len(batch) == batch_size:
+                self._solve_sinkhorn_batch(
+                    batch, shape, edge_kwargs["reg"], curvature, potentials
+                )
+                batch.clear()
 
-        edge_weight = self.G.edges[source_node, target_node][self.edge_weight_key]
-        curvature = 1 - (opt_transport / edge_weight)
-        return curvature
+        for shape, batch in batches.items():
+            if batch:
+                self._solve_sinkhorn_batch(
+                    batch, shape, edge_kwargs["reg"], curvature, potentials
+                )
+        return curvature.tolist()
+
+    def _sweep_edge_curvature(
+        self, edge, parameters, weight_path_matrix, numThreads, reg, exact_shortcut
+    ):
+        """
+        Curvature of an edge for each (alpha, dist_type, method) combination
+        of parameters, with the shortest path matrix built once. Combinations
+        with the "sinkhorn-batch" method are solved together as one batch.
+
+        Returns
+        -------
+        list of curvature values in the order of parameters
+
+        """
+        source = self._node_index[edge[0]]
+        target = self._node_index[edge[1]]
+        edge_weight = self._get_edge_weight(source, target)
+        # False once the edge is known not to have a closed form
+        tree_like = exact_shortcut and not weight_path_matrix
+        short_path_matrix = None
+        batch = []
+        curvature = np.empty(len(parameters))
+        for column, (alpha, dist_type, method) in enumerate(parameters):
+            source_neighbors, source_dist = self._mass_distribution(
+                source, alpha, dist_type
+            )
+            target_neighbors, target_dist = self._mass_distribution(
+                target, alpha, dist_type
+            )
+            if short_path_matrix is None:
+                short_path_matrix = self._get_shortest_path_matrix(
+                    source_neighbors, target_neighbors, weight_path_matrix
+                )
+            if tree_like and method == "otd" and dist_type == "uniform":
+                opt_transport = self._tree_like_transport_distance(
+                    source, target, alpha, short_path_matrix
+                )
+                if opt_transport is not None:
+                    curvature[column] = 1 - opt_transport / edge_weight
+                    continue
+                tree_like = False
+
+            if method == "sinkhorn-batch":
+                batch.append((column, source_dist, target_dist))
+                continue
+            opt_transport = self._solve_transport(
+                source_dist, target_dist, short_path_matrix, method, numThreads, reg
+            )
+            curvature[column] = 1 - opt_transport / edge_weight
+
+        if batch:
+            columns, source_dists, target_dists = zip(*batch)
+            opt_transport = batched_sinkhorn2(
+                np.array(source_dists),
+                np.array(target_dists),
+                np.broadcast_to(short_path_matrix, (len(batch),) + short_path_matrix.shape),
+                reg,
+            )
+            curvature[list(columns)] = 1 - opt_transport / edge_weight
+        return curvature.tolist()
+
+    def _solve_sinkhorn_batch(self, batch, shape, reg, curvature, potentials=None):
+        """
+        Pad a batch of transport problems to a common shape, solve them together
+        and write the curvature of each edge into curvature
+
+        """
+        source_dists = np.zeros((len(batch), shape[0]))
+        target_dists = np.zeros((len(batch), shape[1]))
+        path_matrices = np.zeros((len(batch),) + shape)
+        for i, (_, _, _, source_dist, target_dist, short_path_matrix) in enumerate(batch):
+            rows, cols = short_path_matrix.shape
+            source_dists[i, :rows] = source_dist
+            target_dists[i, :cols] = target_dist
+            path_matrices[i, :rows, :cols] = short_path_matrix
+
+        if potentials is None:
+            opt_transport = batched_sinkhorn2(
+                source_dists, target_dists, path_matrices, reg
+            )
+        else:
+            u = (source_dists > 0) / (source_dists > 0).sum(axis=1, keepdims=True)
+            v = (target_dists > 0) / (target_dists > 0).sum(axis=1, keepdims=True)
+            for i, (_, edge, *_) in enumerate(batch):
+                if edge in potentials:
+                    u[i], v[i] = potentials[edge]
+            opt_transport, u, v = batched_sinkhorn2(
+                source_dists, target_dists, path_matrices, reg, warmstart=(u, v), log=True
+            )
+            for i, (_, edge, *_) in enumerate(batch):
+                potentials[edge] = (u[i], v[i])
+
+        for (k, _, edge_weight, _, _, _), cost in zip(batch, opt_transport):
+            curvature[k] = 1 - (cost / edge_weight)
+
+    def _warm_sinkhorn_edge_curvature(
+        self, edge, potentials, alpha, dist_type, weight_path_matrix, reg, **kwargs
+    ):
+        """
+        Curvature of an edge with the "sinkhorn" method started from the
+        scaling vectors stored for the edge in potentials, which are replaced
+        by the final scaling vectors
+
+        """
+        source = self._node_index[edge[0]]
+        target = self._node_index[edge[1]]
+        source_dist, target_dist, short_path_matrix = self._transport_problem(
+            source, target, alpha, dist_type, weight_path_matrix
+        )
+        transport_plan, log = ot.sinkhorn(
+            source_dist,
+            target_dist,
+            short_path_matrix,
+            reg,
+            warmstart=potentials.get(edge),
+            log=True,
+        )
+        potentials[edge] = (np.log(log["u"]), np.log(log["v"]))
+        opt_transport = (transport_plan * short_path_matrix).sum()
+        return float(1 - (opt_transport / self._get_edge_weight(source, target)))
 
     def _neighborhood_mass_distribution(self, node, alpha, dist_type):
         """
@@ -194,67 +1031,81 @@ class OllivierRicciCurvature(_RicciCurvature):
         distribution : numpy array
             array of mass at each node in array neighbors
 
+        """
+        neighbors, distribution = self._mass_distribution(
+            self._node_index[node], alpha, dist_type
+        )
+        return [self._nodes[neighbor] for neighbor in neighbors], distribution
+
+    def _cached_mass_distribution(self, node, alpha, dist_type):
+        """
+        _mass_distribution of a node, computed once and reused by every edge
+        incident to it. The cache holds at most mass_cache_size nodes and is
+        emptied when alpha or dist_type change.
+
+        """
+        if self._mass_cache_key != (alpha, dist_type):
+            self._mass_cache.clear()
+            self._mass_cache_key = (alpha, dist_type)
+        cached = self._mass_cache.get(node)
+        if cached is not None:
+            self._mass_cache.move_to_end(node)
+            return cached
+
+        neighbors, distribution = self._mass_distribution(node, alpha, dist_type)
+        # shared between edges, so must not be modified by callers
+        neighbors.setflags(write=False)
+        distribution.setflags(write=False)
+        if self.mass_cache_size > 0:
+            self._mass_cache[node] = (neighbors, distribution)
+            if len(self._mass_cache) > self.mass_cache_size:
+                self._mass_cache.popitem(last=False)
+        return neighbors, distribution
+
+    def _mass_distribution(self, node, alpha, dist_type):
+        """
+        Mass distribution of _neighborhood_mass_distribution for a node given
+        by its integer id
+
+        Returns
+        -------
+        neighbors : numpy array
+            integer ids of nearest neighbor nodes of input node followed by the
+            node itself
+        distribution : numpy array
+            array of mass at each node in array neighbors
+
         """
         neighbors = self._get_neighbors(node)
         num_neighbors = len(neighbors)
         if num_neighbors == 0:
-            return [node], [1]
+            return np.array([node]), np.array([1.0])
         elif num_neighbors == 1:
-            distribution = [1 - alpha]
+            distribution = np.array([1 - alpha])
         else:
+            weights = self._get_neighbor_weights(node)
             if dist_type == "uniform":
-                distribution = [(1 - alpha) / (num_neighbors) for neighbor in neighbors]
+                distribution = np.full(num_neighbors, (1 - alpha) / num_neighbors)
             elif dist_type == "linear":
-                weight_sum = self._calculate_weight_sum(node, neighbors)
-                distribution = [
-                    (1 - alpha)
-                    * (self.G[node][neighbor][self.edge_weight_key] / weight_sum)
-                    for neighbor in neighbors
-                ]
+                weight_sum = self._calculate_weight_sum(node)
+                distribution = (1 - alpha) * (weights / weight_sum)
             elif dist_type == "inverse-linear":
-                weight_sum = self._calculate_weight_sum(node, neighbors)
-                distribution = [
-                    (
-                        (1 - alpha)
-                        * (
-                            (
-                                1
-                                - (
-                                    self.G[node][neighbor][self.edge_weight_key]
-                                    / weight_sum
-                                )
-                            )
-                            / (num_neighbors - 1)
-                        )
-                    )
-                    for neighbor in neighbors
-                ]
+                weight_sum = self._calculate_weight_sum(node)
+                distribution = (1 - alpha) * (
+                    (1 - (weights / weight_sum)) / (num_neighbors - 1)
+                )
             elif dist_type == "gaussian":
-                weight_sum = self._calculate_gauss_weight_sum(node, neighbors)
-                distribution = [
-                    (1 - alpha)
-                    * (
-                        math.e ** (-self.G[node][neighbor][self.edge_weight_key] ** 2)
-                        / weight_sum
-                    )
-                    for neighbor in neighbors
-                ]
+                weight_sum = self._calculate_gauss_weight_sum(node)
+                distribution = (1 - alpha) * (np.exp(-(weights**2)) / weight_sum)
             else:
                 raise NotImplementedError(
                     "Specified dist_type is not available. Options: uniform, linear, inverse-linear, gaussian."
                 )
-        return neighbors + [node], np.array(
-            distribution + [alpha]
-        )  # return neighbors as list for nx.shortest_path_length
+        return np.append(neighbors, node), np.append(distribution, alpha)
 
-    def _calculate_gauss_weight_sum(self, node, neighbors):
+    def _calculate_gauss_weight_sum(self, node):
         """
         Need to normalize with exponential if using a gaussian mass distribution
 
         """
-        return sum(
-            [
-                math.e ** (-self.G[node][neighbor][self.edge_weight_key] ** 2)
-                for neighbor in neighbors
-            ]
-        )
+        return np.exp(-(self._get_neighbor_weights(node) ** 2)).sum()
@@ -0,0 +1,338 @@
+"""
+Split the curvature calculation of a graph into shards that can be calculated
+independently, e.g. on different machines, and merged afterwards.
+
+Every edge is owned by exactly one shard. A shard holds its owned edges and
+the halo of ghost nodes and edges their curvature depends on: the nodes
+within 1 hop of the owned edges for Forman curvature and within 2 hops for
+Ollivier curvature (shortest paths between the neighborhoods of an edge are
+at most 3 hops long). Shards are .npz files of integer node positions in
+G.nodes(), so they can be read without the original graph or pickled
+objects.
+
+Usage:
+    write_shards(G, path, num_shards=8, calculator=OllivierRicciCurvature)
+    python -m graph_ricci_curvature.sharding compute path/shard_00000.npz --parameters '{"alpha": 0.5}'
+    python -m graph_ricci_curvature.sharding merge path
+    CurvatureStore(path).attach(G)
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import networkx as nx
+import numpy as np
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+from graph_ricci_curvature.curvature_store import CurvatureStore
+from graph_ricci_curvature.forman_ricci_curvature import FormanRicciCurvature
+from graph_ricci_curvature.ollivier_ricci_curvature import OllivierRicciCurvature
+
+CALCULATORS = {
+    "FormanRicciCurvature": FormanRicciCurvature,
+    "OllivierRicciCurvature": OllivierRicciCurvature,
+}
+
+# hops around the owned edges a shard needs to calculate them exactly
+HALO_HOPS = {"FormanRicciCurvature": 1, "OllivierRicciCurvature": 2}
+
+
+def partition_edges(calculator, num_shards):
+    """
+    Assign every edge to the shard that owns it. Nodes are split into blocks
+    of a reverse Cuthill-McKee ordering, so neighboring nodes tend to share a
+    shard, and an edge is owned by the shard of its endpoint that comes first
+    in the ordering. Blocks are chosen so every shard owns about the same
+    number of edges.
+
+    Parameters
+    ----------
+    calculator : OllivierRicciCurvature or FormanRicciCurvature
+        calculator object of the graph
+    num_shards : int
+        number of shards
+
+    Returns
+    -------
+    numpy array with the shard of every edge ordered by integer edge id
+
+    """
+    order = reverse_cuthill_mckee(calculator._adjacency, symmetric_mode=True)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    edges = calculator._edges
+    owner_rank = np.minimum(rank[edges[:, 0]], rank[edges[:, 1]])
+
+    owned_before = np.cumsum(np.bincount(owner_rank, minlength=len(order))) - 1
+    shard_of_rank = np.minimum(
+        np.maximum(owned_before, 0) * num_shards // max(len(edges), 1), num_shards - 1
+    )
+    return shard_of_rank[owner_rank]
+
+
+def _checksum(*arrays):
+    """
+    Hex digest of the dtypes, shapes and contents of arrays, identifying the
+    graph and partition a set of shards was written for
+
+    """
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def write_shards(
+    G: nx.Graph,
+    path,
+    num_shards,
+    calculator=OllivierRicciCurvature,
+    edge_weight_key="weight",
+    node_weight_key="weight",
+):
+    """
+    Partition G and write a shard file for each part, along with the edge
+    index and edge weights of the whole graph used by merge_shards
+
+    Parameters
+    ----------
+    G : networkx graph
+        Input graph. Not modified.
+    path : str
+        Directory to write to. Created if it does not exist.
+    num_shards : int
+        Number of shards
+    calculator : class
+        OllivierRicciCurvature or FormanRicciCurvature
+    edge_weight_key : str
+        Key to specify edge weights in networkx graph. Default = weight.
+    node_weight_key : str
+        Key to specify node weights in networkx graph. Default = weight.
+
+    Returns
+    -------
+    list of paths of the shard files
+
+    """
+    name = calculator.__name__
+    if name not in CALCULATORS:
+        raise NotImplementedError(
+            "Sharding is available for OllivierRicciCurvature and FormanRicciCurvature."
+        )
+    graph = calculator(G, edge_weight_key, node_weight_key, copy=False)
+    edges = graph._edges
+    edge_weights = graph._weights[graph._edge_slots()]
+    owner = partition_edges(graph, num_shards)
+    checksum = _checksum(
+        np.array(name), edges, edge_weights, graph._node_weights, owner
+    )
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "edge_index.npy"), edges)
+    np.save(os.path.join(path, "edge_weight.npy"), edge_weights)
+    manifest = {
+        "calculator": name,
+        "num_shards": num_shards,
+        "halo_hops": HALO_HOPS[name],
+        "number_of_nodes": len(graph._nodes),
+        "number_of_edges": len(edges),
+        "checksum": checksum,
+    }
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    shard_paths = []
+    for k in range(num_shards):
+        owned = np.flatnonzero(owner == k)
+        nodes = np.unique(edges[owned])
+        for _ in range(HALO_HOPS[name]):
+            nodes = np.union1d(nodes, graph._adjacency[nodes].indices)
+        in_shard = np.zeros(len(graph._nodes), dtype=bool)
+        in_shard[nodes] = True
+        local = np.flatnonzero(in_shard[edges[:, 0]] & in_shard[edges[:, 1]])
+
+        shard_path = os.path.join(path, f"shard_{k:05d}.npz")
+        np.savez(
+            shard_path,
+            calculator=np.array(name),
+            nodes=nodes,
+            node_weights=graph._node_weights[nodes],
+            edge_ids=local,
+            edges=edges[local],
+            edge_weights=edge_weights[local],
+            owned=owned,
+            checksum=np.array(checksum),
+        )
+        shard_paths.append(shard_path)
+    return shard_paths
+
+
+def compute_shard(shard_path, **kwargs):
+    """
+    Calculate the curvature of the owned edges of a shard and write it next to
+    the shard file as <shard>.result.npz
+
+    Parameters
+    ----------
+    shard_path : str
+        path of a shard file written by write_shards
+    kwargs : dict
+        Arguments of calculate_ricci_curvature of the shard's calculator.
+        Weighted shortest paths are not bounded by the halo, so
+        weight_path_matrix=True is not available.
+
+    Returns
+    -------
+    path of the result file
+
+    """
+    if kwargs.get("weight_path_matrix"):
+        raise NotImplementedError(
+            "Weighted shortest paths can leave the halo of a shard. Use weight_path_matrix=False."
+        )
+    with np.load(shard_path) as shard:
+        name = shard["calculator"].item()
+        G = nx.Graph()
+        G.add_nodes_from(
+            (node, {"weight": weight})
+            for node, weight in zip(shard["nodes"].tolist(), shard["node_weights"].tolist())
+        )
+        G.add_weighted_edges_from(
+            (source, target, weight)
+            for (source, target), weight in zip(
+                shard["edges"].tolist(), shard["edge_weights"].tolist()
+            )
+        )
+        owned = shard["owned"]
+        edge_ids = shard["edge_ids"]
+        local_edges = shard["edges"]
+        checksum = shard["checksum"].item()
+
+    owned_edges = local_edges[np.searchsorted(edge_ids, owned)].tolist()
+    curvature = np.empty(0)
+    if owned_edges:
+        calculator = CALCULATORS[name](G, copy=False)
+        calculator.calculate_ricci_curvature(edges=owned_edges, **kwargs)
+        edge_curvature = calculator.edge_curvature
+        curvature = np.array([edge_curvature[tuple(edge)] for edge in owned_edges])
+
+    result_path = shard_path[: -len(".npz")] + ".result.npz"
+    np.savez(
+        result_path,
+        owned=owned,
+        curvature=curvature,
+        parameters=np.array(json.dumps(kwargs)),
+        checksum=np.array(checksum),
+    )
+    return result_path
+
+
+def merge_shards(path, norm=True):
+    """
+    Combine the results of every shard of path into edge curvature, contract
+    it to node and graph curvature over the whole graph and write them to
+    path in the format of CurvatureStore
+
+    Parameters
+    ----------
+    path : str
+        Directory written by write_shards whose shards have all been computed
+        with the same parameters
+    norm : bool
+        If True, normalize nodal scalar curvature.
+
+    Returns
+    -------
+    CurvatureStore opened on path
+
+    """
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    edges = np.load(os.path.join(path, "edge_index.npy"))
+    edge_weights = np.load(os.path.join(path, "edge_weight.npy"))
+
+    edge_curvature = np.full(len(edges), np.nan)
+    result_paths = sorted(glob.glob(os.path.join(path, "shard_*.result.npz")))
+    if len(result_paths) != manifest["num_shards"]:
+        raise ValueError(
+            f"Found {len(result_paths)} shard results, expected {manifest['num_shards']}."
+        )
+    parameters = None
+    for result_path in result_paths:
+        with np.load(result_path) as result:
+            if result["checksum"].item() != manifest["checksum"]:
+                raise ValueError(
+                    f"{result_path} was computed from shards of a different graph or partition."
+                )
+            result_parameters = json.loads(result["parameters"].item())
+            if parameters is not None and result_parameters != parameters:
+                raise ValueError(
+                    f"{result_path} was computed with parameters {result_parameters}, "
+                    f"other shards with {parameters}."
+                )
+            parameters = result_parameters
+            edge_curvature[result["owned"]] = result["curvature"]
+
+    # contract at both endpoints of every edge, as _calculate_node_curvatures
+    num_nodes = manifest["number_of_nodes"]
+    endpoints = edges.T.ravel()
+    weights = np.tile(edge_weights, 2) if norm else np.ones(2 * len(edges))
+    weighted_curvature = np.bincount(
+        endpoints, np.tile(edge_curvature, 2) * weights, minlength=num_nodes
+    )
+    weight_sums = np.bincount(endpoints, weights, minlength=num_nodes)
+    if norm:
+        node_curvature = np.divide(
+            weighted_curvature,
+            weight_sums,
+            out=np.zeros(num_nodes),
+            where=weight_sums != 0,
+        )
+    else:
+        node_curvature = weighted_curvature
+    graph_curvature = float(node_curvature.sum())
+
+    np.save(os.path.join(path, "edge_curvature.npy"), edge_curvature)
+    np.save(os.path.join(path, "node_curvature.npy"), node_curvature)
+    np.save(
+        os.path.join(path, "graph_curvature.npy"),
+        np.array([graph_curvature, graph_curvature / num_nodes]),
+    )
+    metadata = {
+        "calculator": manifest["calculator"],
+        "parameters": dict(parameters, norm=norm),
+        "number_of_nodes": num_nodes,
+        "number_of_edges": len(edges),
+    }
+    with open(os.path.join(path, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+    return CurvatureStore(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    compute = commands.add_parser("compute", help="calculate the curvature of a shard")
+    compute.add_argument("shard")
+    compute.add_argument(
+        "--parameters",
+        type=json.loads,
+        default={},
+        help="JSON object of calculate_ricci_curvature arguments",
+    )
+    merge = commands.add_parser("merge", help="merge the results of every shard")
+    merge.add_argument("path")
+    merge.add_argument("--no-norm", action="store_true", help="unnormalized node curvature")
+    args = parser.parse_args(argv)
+
+    if args.command == "compute":
+        print(compute_shard(args.shard, **args.parameters))
+    else:
+        merge_shards(args.path, norm=not args.no_norm)
+
+
+if __name__ == "__main__":
+    main()
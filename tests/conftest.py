@@ -1,5 +1,6 @@
 import pytest
 import networkx as nx
+import numpy as np
 
 
 @pytest.fixture
@@ -34,3 +35,15 @@ def grid_graph():
     """Mock optimizer"""
     G = nx.grid_2d_graph(10, 10, periodic=True)
     return G
+
+
+@pytest.fixture
+def random_weighted_graph():
+    """Mock optimizer"""
+    G = nx.gnm_random_graph(30, 80, seed=1)
+    rng = np.random.default_rng(1)
+    for edge in G.edges():
+        G.edges[edge]["weight"] = rng.uniform(0.5, 2)
+    for node in G.nodes():
+        G.nodes[node]["weight"] = rng.uniform(0.5, 2)
+    return G
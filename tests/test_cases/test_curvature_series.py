@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+from graph_ricci_curvature.forman_ricci_curvature import FormanRicciCurvature
+from graph_ricci_curvature.ollivier_ricci_curvature import OllivierRicciCurvature
+
+
+def _snapshots(G, count, seed=0):
+    """Copies of G with a few edges removed, added and reweighted each step"""
+    rng = np.random.default_rng(seed)
+    snapshots = [G]
+    for _ in range(count - 1):
+        G = G.copy()
+        edges = list(G.edges())
+        for i in rng.choice(len(edges), 2, replace=False):
+            G.remove_edge(*edges[i])
+        G.add_edge(int(rng.integers(30)), 30 + len(snapshots), weight=1.5)
+        source, target = edges[int(rng.integers(len(edges)))]
+        if G.has_edge(source, target):
+            G[source][target]["weight"] = 0.75
+        G.nodes[int(rng.integers(30))]["weight"] = 2.0
+        snapshots.append(G)
+    return snapshots
+
+
+@pytest.mark.parametrize(
+    "calculator,kwargs",
+    [
+        (OllivierRicciCurvature, {"dist_type": "linear"}),
+        (FormanRicciCurvature, {}),
+    ],
+)
+def test_curvature_series(random_weighted_graph, calculator, kwargs):
+    """
+    Test curvature carried forward between snapshots matches calculating every
+    snapshot from scratch
+
+    """
+    snapshots = _snapshots(random_weighted_graph, 4)
+    series = calculator.curvature_series(iter(snapshots), **kwargs)
+    assert len(series) == 4
+    assert series.edge_curvature.shape == (4, len(series.edges))
+    assert series.node_curvature.shape == (4, len(series.nodes))
+    assert series.recalculated_edges[0] == random_weighted_graph.number_of_edges()
+    assert (series.recalculated_edges[1:] < series.recalculated_edges[0]).all()
+
+    edge_columns = {edge: column for column, edge in enumerate(series.edges)}
+    node_columns = {node: column for column, node in enumerate(series.nodes)}
+    for t, G in enumerate(snapshots):
+        expected = calculator(G)
+        expected.calculate_ricci_curvature(**kwargs)
+        present = np.zeros(len(series.edges), dtype=bool)
+        for (source, target), curvature in expected.edge_curvature.items():
+            column = edge_columns.get((source, target), edge_columns.get((target, source)))
+            present[column] = True
+            assert series.edge_curvature[t, column] == pytest.approx(curvature)
+        assert np.isnan(series.edge_curvature[t, ~present]).all()
+        for node, curvature in expected.node_curvature.items():
+            assert series.node_curvature[t, node_columns[node]] == pytest.approx(curvature)
+        assert series.graph_curvature[t] == pytest.approx(expected.graph_curvature)
@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+from graph_ricci_curvature.curvature_store import CurvatureStore
+from graph_ricci_curvature.forman_ricci_curvature import FormanRicciCurvature
+from graph_ricci_curvature.ollivier_ricci_curvature import OllivierRicciCurvature
+
+
+def test_memory_mapped_arrays(grid_graph, tmp_path):
+    """
+    Test stored curvature is opened as memory mapped arrays matching the
+    calculated curvature
+
+    """
+    obj = FormanRicciCurvature(grid_graph)
+    obj.calculate_ricci_curvature()
+    obj.save_curvature(tmp_path)
+    store = CurvatureStore(tmp_path)
+    assert isinstance(store.edge_curvature, np.memmap)
+    assert np.array_equal(store.edge_curvature, obj._edge_curvature)
+    assert np.array_equal(store.node_curvature, obj._node_curvature)
+    assert np.array_equal(store.edge_index, obj._edges)
+    assert list(store.graph_curvature) == [-400, -4]
+    assert store.metadata["calculator"] == "FormanRicciCurvature"
+
+
+def test_attach(random_weighted_graph, tmp_path):
+    """
+    Test attaching stored curvature to a graph reproduces the attributes set by
+    the calculation
+
+    """
+    obj = OllivierRicciCurvature(random_weighted_graph)
+    obj.calculate_ricci_curvature(dist_type="linear")
+    store = obj.save_curvature(tmp_path)
+    assert store.metadata["parameters"]["dist_type"] == "linear"
+
+    G = CurvatureStore(tmp_path).attach(random_weighted_graph.copy())
+    assert list(G.edges.data("ricci_curvature")) == list(
+        obj.G.edges.data("ricci_curvature")
+    )
+    assert list(G.nodes.data("ricci_curvature")) == list(
+        obj.G.nodes.data("ricci_curvature")
+    )
+    assert G.graph == obj.G.graph
+
+
+def test_attach_wrong_graph(simple_graph, grid_graph, tmp_path):
+    """
+    Test attaching stored curvature to a graph with different nodes fails
+
+    """
+    obj = FormanRicciCurvature(grid_graph)
+    obj.calculate_ricci_curvature()
+    obj.save_curvature(tmp_path)
+    with pytest.raises(ValueError):
+        CurvatureStore(tmp_path).attach(simple_graph)
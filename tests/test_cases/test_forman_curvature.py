@@ -1,5 +1,6 @@
 import pytest
 import numpy as np
+import networkx as nx
 from graph_ricci_curvature.forman_ricci_curvature import FormanRicciCurvature
 
 
@@ -48,3 +49,206 @@ def test_complete_graph(complete_graph):
     obj.calculate_ricci_curvature()
     for edge in obj.G.edges():
         assert obj.G[edge[0]][edge[1]]["ricci_curvature"] == -4
+
+
+def test_vectorized_ricci_tensor(random_weighted_graph):
+    """
+    Test the vectorized whole graph calculation matches the curvature of each
+    edge calculated separately
+
+    """
+    obj = FormanRicciCurvature(random_weighted_graph)
+    obj.calculate_ricci_curvature()
+    for source, target, curvature in obj.G.edges.data("ricci_curvature"):
+        assert curvature == pytest.approx(obj.calculate_edge_curvature(source, target))
+    for node, curvature in obj.G.nodes.data("ricci_curvature"):
+        assert curvature == pytest.approx(
+            obj._calculate_node_curvature(obj._node_index[node])
+        )
+
+
+def test_incremental_updates(random_weighted_graph):
+    """
+    Test curvature updated after adding, removing and reweighting edges matches
+    curvature calculated from scratch on the changed graph
+
+    """
+    obj = FormanRicciCurvature(random_weighted_graph)
+    obj.calculate_ricci_curvature()
+    edge = next(iter(random_weighted_graph.edges()))
+    obj.add_edge(0, 30, weight=1.5)
+    obj.remove_edge(*edge)
+    obj.update_weight(0, 30, 0.7)
+    random_weighted_graph.add_edge(0, 30, weight=0.7)
+    random_weighted_graph.nodes[30]["weight"] = 1.0
+    random_weighted_graph.remove_edge(*edge)
+
+    expected = FormanRicciCurvature(random_weighted_graph)
+    expected.calculate_ricci_curvature()
+    assert {
+        (source, target): curvature
+        for source, target, curvature in obj.G.edges.data("ricci_curvature")
+    } == pytest.approx(
+        {
+            (source, target): curvature
+            for source, target, curvature in expected.G.edges.data("ricci_curvature")
+        }
+    )
+    assert dict(obj.G.nodes.data("ricci_curvature")) == pytest.approx(
+        dict(expected.G.nodes.data("ricci_curvature"))
+    )
+    assert obj.G.graph == pytest.approx(expected.G.graph)
+
+
+def test_uncopied_graph(grid_graph):
+    """
+    Test calculating curvature without copying the graph leaves the input
+    graph untouched and returns the same curvature through mappings
+
+    """
+    obj = FormanRicciCurvature(grid_graph, copy=False)
+    obj.calculate_ricci_curvature()
+    assert obj.G is grid_graph
+    assert all(not data for _, _, data in grid_graph.edges.data())
+    assert all(not data for _, data in grid_graph.nodes.data())
+    assert obj.edge_curvature[(0, 0), (0, 1)] == -4
+    assert set(obj.node_curvature.values()) == {-4}
+    assert obj.graph_curvature == (-400, -4)
+
+
+def test_profiling(grid_graph):
+    """
+    Test profiling times the vectorized edge and node stages
+
+    """
+    obj = FormanRicciCurvature(grid_graph)
+    profiler = obj.enable_profiling()
+    obj.calculate_ricci_curvature()
+    assert profiler.report()["calls"] == {"edge_curvature": 1, "node_contraction": 1}
+    assert obj.G.graph["norm_graph_ricci_curvature"] == -4
+
+
+def test_subset_ricci_tensor(random_weighted_graph):
+    """
+    Test calculating only the edges around some nodes gives the same edge and
+    node curvature as calculating every edge
+
+    """
+    expected = FormanRicciCurvature(random_weighted_graph)
+    expected.calculate_ricci_curvature()
+
+    edge = list(random_weighted_graph.edges())[-1]
+    obj = FormanRicciCurvature(random_weighted_graph)
+    obj.calculate_ricci_curvature(nodes=[3], edges=[edge])
+    assert obj.node_curvature[3] == pytest.approx(expected.node_curvature[3])
+    requested = [(3, neighbor) for neighbor in random_weighted_graph[3]] + [edge]
+    assert {
+        edge: obj.edge_curvature[edge] for edge in requested
+    } == pytest.approx({edge: expected.edge_curvature[edge] for edge in requested})
+    assert np.count_nonzero(~np.isnan(obj._edge_curvature)) == len(
+        {frozenset(edge) for edge in requested}
+    )
+
+    lazy = FormanRicciCurvature(random_weighted_graph)
+    assert lazy.curvature[edge] == pytest.approx(expected.edge_curvature[edge])
+
+
+def test_iter_edge_curvature(random_weighted_graph):
+    """
+    Test generated edge curvatures match calculating every edge
+
+    """
+    obj = FormanRicciCurvature(random_weighted_graph)
+    generated = list(obj.iter_edge_curvature(chunk_size=16))
+    obj.calculate_ricci_curvature()
+    assert [(source, target) for source, target, _ in generated] == list(obj.G.edges())
+    assert [curvature for _, _, curvature in generated] == pytest.approx(
+        [curvature for _, _, curvature in obj.G.edges.data("ricci_curvature")]
+    )
+
+
+def test_curvature_batch(random_weighted_graph, grid_graph):
+    """
+    Test curvature of graphs calculated together matches calculating each graph
+    on its own
+
+    """
+    graphs = [random_weighted_graph, nx.path_graph(["a", "b", "c"]), grid_graph]
+    results = list(FormanRicciCurvature.curvature_batch(graphs, norm=False))
+    for G, result in zip(graphs, results):
+        expected = FormanRicciCurvature(G)
+        expected.calculate_ricci_curvature(norm=False)
+        assert result["edge_curvature"] == pytest.approx(dict(expected.edge_curvature))
+        assert result["node_curvature"] == pytest.approx(dict(expected.node_curvature))
+        assert result["graph_curvature"] == pytest.approx(expected.graph_curvature)
+
+
+def test_estimate_graph_curvature(grid_graph):
+    """
+    Test sampled graph curvature is exact when every node has the same
+    curvature and its confidence intervals cover the graph curvature
+    at the requested rate
+
+    """
+    obj = FormanRicciCurvature(grid_graph)
+    estimate = obj.estimate_graph_curvature(seed=0)
+    assert estimate["graph_curvature"] == (-400, -4)
+    assert estimate["sampled_nodes"] == 100
+
+    G = nx.barabasi_albert_graph(300, 2, seed=0)
+    obj = FormanRicciCurvature(G)
+    obj.calculate_ricci_curvature()
+    total = obj.graph_curvature[0]
+    covered = 0
+    for seed in range(100):
+        estimate = obj.estimate_graph_curvature(rel_error=0.2, seed=seed)
+        low, high = estimate["confidence_interval"][0]
+        covered += low <= total <= high
+        assert estimate["sampled_nodes"] < 300
+    assert covered >= 85
+
+    estimate = obj.estimate_graph_curvature(rel_error=0.0, max_edges=100, seed=0)
+    assert estimate["calculated_edges"] <= 100
+
+
+def test_estimate_degenerate_graph_curvature():
+    """
+    Test sampled graph curvature with a zero sample mean or a sample of equal
+    node curvature keeps sampling instead of failing or stopping early
+
+    """
+    G = nx.gnm_random_graph(60, 100, seed=151)
+    G.remove_nodes_from(list(nx.isolates(G)))
+    obj = FormanRicciCurvature(G)
+    obj.calculate_ricci_curvature(norm=False)
+    estimate = obj.estimate_graph_curvature(seed=1, min_samples=4, norm=False)
+    low, high = estimate["confidence_interval"][0]
+    assert low <= obj.graph_curvature[0] <= high
+
+    G = nx.cycle_graph(200)
+    G.add_edge(0, 100)
+    obj = FormanRicciCurvature(G)
+    obj.calculate_ricci_curvature()
+    estimate = obj.estimate_graph_curvature(seed=0, min_samples=10)
+    low, high = estimate["confidence_interval"][0]
+    assert low <= obj.graph_curvature[0] <= high
+    assert estimate["relative_error"] > 0 or estimate["sampled_nodes"] == 200
+
+
+def test_edge_chunk_reads_incident_edges(random_weighted_graph):
+    """
+    Test calculating a chunk of edges only reads the weights of edges incident
+    to their endpoints
+
+    """
+    obj = FormanRicciCurvature(random_weighted_graph)
+    obj.calculate_ricci_curvature()
+    edges = list(random_weighted_graph.edges())[:3]
+    expected = [obj.edge_curvature[edge] for edge in edges]
+
+    endpoints = [obj._node_index[node] for edge in edges for node in edge]
+    incident = np.zeros(len(obj._weights), dtype=bool)
+    for node in endpoints:
+        incident[obj._indptr[node] : obj._indptr[node + 1]] = True
+    obj._weights[~incident] = np.nan
+    assert obj._calculate_edge_chunk(edges) == pytest.approx(expected)
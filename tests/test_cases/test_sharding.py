@@ -0,0 +1,102 @@
+import json
+import subprocess
+import sys
+import pytest
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from graph_ricci_curvature.curvature_store import CurvatureStore
+from graph_ricci_curvature.forman_ricci_curvature import FormanRicciCurvature
+from graph_ricci_curvature.ollivier_ricci_curvature import OllivierRicciCurvature
+from graph_ricci_curvature.sharding import compute_shard, merge_shards, write_shards
+
+
+def _compute(shard, parameters):
+    return compute_shard(shard, **parameters)
+
+
+@pytest.mark.parametrize(
+    "calculator,parameters",
+    [
+        (OllivierRicciCurvature, {"alpha": 0.3, "dist_type": "linear"}),
+        (OllivierRicciCurvature, {"method": "sinkhorn-batch", "reg": 1.0}),
+        (FormanRicciCurvature, {}),
+    ],
+)
+def test_sharded_ricci_tensor(random_weighted_graph, tmp_path, calculator, parameters):
+    """
+    Test curvature computed shard by shard in separate processes and merged
+    matches curvature of the whole graph
+
+    """
+    expected = calculator(random_weighted_graph)
+    expected.calculate_ricci_curvature(**parameters)
+
+    shards = write_shards(random_weighted_graph, str(tmp_path), 4, calculator)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        list(executor.map(_compute, shards, [parameters] * len(shards)))
+    store = merge_shards(str(tmp_path))
+
+    G = store.attach(random_weighted_graph.copy())
+    assert dict(
+        ((source, target), curvature)
+        for source, target, curvature in G.edges.data("ricci_curvature")
+    ) == pytest.approx(
+        {
+            (source, target): curvature
+            for source, target, curvature in expected.G.edges.data("ricci_curvature")
+        }
+    )
+    assert dict(G.nodes.data("ricci_curvature")) == pytest.approx(
+        dict(expected.G.nodes.data("ricci_curvature"))
+    )
+    assert tuple(store.graph_curvature) == pytest.approx(expected.graph_curvature)
+
+
+def test_sharding_command_line(grid_graph, tmp_path):
+    """
+    Test shards computed and merged with the command line entry point
+
+    """
+    shards = write_shards(grid_graph, str(tmp_path), 3)
+    for shard in shards:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "graph_ricci_curvature.sharding",
+                "compute",
+                shard,
+                "--parameters",
+                json.dumps({"alpha": 0.5}),
+            ],
+            check=True,
+        )
+    subprocess.run(
+        [sys.executable, "-m", "graph_ricci_curvature.sharding", "merge", str(tmp_path)],
+        check=True,
+    )
+    store = CurvatureStore(str(tmp_path))
+    assert np.allclose(store.edge_curvature, 0)
+    assert store.metadata["parameters"] == {"alpha": 0.5, "norm": True}
+    with pytest.raises(NotImplementedError):
+        compute_shard(shards[0], weight_path_matrix=True)
+
+
+def test_merge_inconsistent_shards(random_weighted_graph, grid_graph, tmp_path):
+    """
+    Test merging refuses shards computed with different parameters and stale
+    results of an earlier partition of the same directory
+
+    """
+    shards = write_shards(random_weighted_graph, str(tmp_path), 2)
+    compute_shard(shards[0], alpha=0.5)
+    compute_shard(shards[1], alpha=0.3)
+    with pytest.raises(ValueError):
+        merge_shards(str(tmp_path))
+
+    write_shards(grid_graph, str(tmp_path), 2, FormanRicciCurvature)
+    compute_shard(shards[0])
+    with pytest.raises(ValueError):
+        merge_shards(str(tmp_path))
+    compute_shard(shards[1])
+    merge_shards(str(tmp_path))